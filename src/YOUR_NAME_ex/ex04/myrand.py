@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import copy
 
 __author__ = 'Kevin Martin Lankut'
 __email__ = 'kela@nmbu.no'
@@ -14,6 +15,26 @@ class LCGRand:
         self.seed = self.a * self.seed % self.m
         return self.seed
 
+    def jump(self, n):
+        # Skip n numbers at once: a**n mod m takes O(log n) multiplications
+        self.seed = pow(self.a, n, self.m) * self.seed % self.m
+
+    def split(self, k):
+        # k generators starting i * (m - 1) // k numbers from here, which
+        # evenly divides the period into non-overlapping substreams
+        generators = []
+        for i in range(k):
+            generator = copy.copy(self)
+            generator.jump(i * (self.m - 1) // k)
+            generators.append(generator)
+        return generators
+
+    def getstate(self):
+        return self.seed
+
+    def setstate(self, state):
+        self.seed = state
+
 
 class ListRand:
     def __init__(self, liste):
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+from myrand import LCGRand
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+
+def test_jump_matches_repeated_rand():
+    """Test that jumping ahead skips exactly n numbers, and back again."""
+    jumping, single = LCGRand(346), LCGRand(346)
+    jumping.jump(1000)
+    for _ in range(1000):
+        single.rand()
+    assert jumping.rand() == single.rand()
+    jumping.jump(-1001)
+    assert jumping.rand() == 5815222
+    assert jumping.rand() == 1099672039
+
+
+def test_split_gives_evenly_spaced_streams():
+    """Test that split substreams start at evenly spaced offsets."""
+    generator = LCGRand(7)
+    streams = generator.split(4)
+    assert generator.getstate() == 7
+    period = generator.m - 1
+    for i, stream in enumerate(streams):
+        expected = LCGRand(7)
+        expected.jump(i * period // 4)
+        assert stream.getstate() == expected.getstate()
+        assert stream.rand() == expected.rand()
+    assert streams[0].getstate() != streams[1].getstate()
+
+
+def test_getstate_setstate():
+    """Test that restoring a state repeats the sequence."""
+    generator = LCGRand(5)
+    state = generator.getstate()
+    first = [generator.rand() for _ in range(5)]
+    generator.setstate(state)
+    assert [generator.rand() for _ in range(5)] == first
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+
+from walker import CensoredSteps, walker_simulator
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+
+def test_max_steps_censors_walk():
+    """Test that a walk stopped at max_steps is returned as CensoredSteps."""
+    steps = walker_simulator(0, 1000, max_steps=50)
+    assert isinstance(steps, CensoredSteps)
+    assert steps == 50
+    assert steps.censored
+    assert repr(steps) == 'CensoredSteps(50)'
+
+
+def test_max_steps_keeps_finished_walk():
+    """Test that a walk reaching home before max_steps is unchanged."""
+    random.seed(3)
+    expected = walker_simulator(0, 3)
+    random.seed(3)
+    steps = walker_simulator(0, 3, max_steps=10 ** 9)
+    assert steps == expected
+    assert not getattr(steps, 'censored', False)
+
+
+@pytest.mark.parametrize('max_steps', [0, -1])
+def test_max_steps_must_be_positive(max_steps):
+    """Test that max_steps below 1 raises ValueError."""
+    with pytest.raises(ValueError):
+        walker_simulator(0, 3, max_steps=max_steps)
+
+
+class Recorder:
+    """Minimal instrumentation recording the calls made to it."""
+
+    def __init__(self):
+        self.calls = []
+
+    def start_run(self):
+        self.calls.append(('start_run',))
+
+    def record_walk(self, steps, draws=None):
+        self.calls.append(('record_walk', steps, draws))
+
+    def end_run(self, walks=()):
+        self.calls.append(('end_run',))
+
+
+def test_instrumentation_records_each_walk():
+    """Test that every walk starts a run, records itself with one draw per
+    step and ends the run."""
+    recorder = Recorder()
+    walks = [walker_simulator(0, 3, instrumentation=recorder)
+             for _ in range(3)]
+    walks.append(walker_simulator(0, 1000, instrumentation=recorder,
+                                  max_steps=20))
+    assert recorder.calls == [call for steps in walks
+                              for call in [('start_run',),
+                                           ('record_walk', steps, steps),
+                                           ('end_run',)]]
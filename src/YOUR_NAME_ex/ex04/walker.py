@@ -5,7 +5,17 @@ __author__ = 'Kevin Martin Lankut'
 __email__ = 'kela@nmbu.no'
 
 
+class CensoredSteps(int):
+    # Number of steps of a walk stopped by max_steps before reaching home
+    censored = True
+
+    def __repr__(self):
+        return 'CensoredSteps({0})'.format(int(self))
+
+
 class Walker:
+    __slots__ = ('x0', 'h', 'steps', 'goal')
+
     def __init__(self, x0, h):
         self.x0 = x0
         self.h = h
@@ -33,13 +43,28 @@ class Walker:
         return self.steps
 
 
-def walker_simulator(x0, h):
+def walker_simulator(x0, h, instrumentation=None, max_steps=None):
+    # instrumentation: any object with start_run, record_walk and end_run,
+    # such as ex05's Instrumentation
+    # max_steps: walks still away from home after this many steps are
+    # stopped and returned as CensoredSteps
+    if max_steps is not None and max_steps < 1:
+        raise ValueError('max_steps must be positive')
+    if instrumentation is not None:
+        instrumentation.start_run()
     w = Walker(x0, h)
     walking = w.goal
     while walking == 0:
+        if max_steps is not None and w.steps == max_steps:
+            break
         w.move()
         walking = w.goal
-    return w.get_steps()
+    steps = w.get_steps() if w.goal else CensoredSteps(w.get_steps())
+    if instrumentation is not None:
+        # one randint per step
+        instrumentation.record_walk(steps, steps)
+        instrumentation.end_run()
+    return steps
 
 
 def five_walker_simulations(x0, h):
@@ -4,12 +4,15 @@ __author__ = 'Kevin Martin Lankut'
 __email__ = 'kela@nmbu.no'
 
 from walker_sim import Walker, Simulation
-import random
+
+ENGINES = ('walk', 'block', 'numpy')
 
 
 class BoundedWalker(Walker):
-    def __init__(self, start, home, left_limit, right_limit):
-        super().__init__(start, home)
+    __slots__ = ('left_limit', 'right_limit')
+
+    def __init__(self, start, home, left_limit, right_limit, rng=None):
+        super().__init__(start, home, rng)
         """
         Initialise the walker
 
@@ -23,6 +26,9 @@ class BoundedWalker(Walker):
             The left boundary of walker movement
         right_limit : int
             The right boundary  of walker movement
+        rng : object
+            Random number provider with a ``randint`` method, the ``random``
+            module if not given
         """
         self.start = start
         self.home = home
@@ -52,8 +58,11 @@ class BoundedWalker(Walker):
 
 
 class BoundedSimulation(Simulation):
-    def __init__(self, start, home, seed, left_limit, right_limit):
-        super().__init__(start, home, seed)
+    def __init__(self, start, home, seed, left_limit, right_limit,
+                 engine='walk', independent_streams=False, cache=None,
+                 instrumentation=None, rng=None):
+        super().__init__(start, home, seed, engine, independent_streams,
+                         cache, instrumentation, rng=rng)
         """
         Initialise the simulation
 
@@ -69,7 +78,26 @@ class BoundedSimulation(Simulation):
             The left boundary of walker movement
         right_limit : int
             The right boundary  of walker movement
+        engine : str
+            ``'walk'`` moves the walker one step at a time, ``'block'``
+            walks it in blocks of steps using NumPy, ``'numpy'`` walks all
+            walkers of a simulation at once with independent NumPy random
+            streams
+        independent_streams : bool
+            If True, the random generator is seeded once per simulation
+            instead of once per walk, so the walks differ from each other
+        cache : WalkCache
+            If given, simulation results are looked up in and stored in
+            this cache
+        instrumentation : Instrumentation
+            If given, runs of the simulation are recorded by it
+        rng : object
+            If given, the walks draw from this random number generator
+            instead of the ``random`` module, see ``Simulation``
         """
+        if engine not in ENGINES:
+            raise ValueError('Unknown engine {0!r}, expected one of {1}'
+                             .format(engine, ENGINES))
         self.start = start
         self.home = home
         self.seed = seed
@@ -85,13 +113,32 @@ class BoundedSimulation(Simulation):
         int
             The number of steps taken
         """
-        random.seed(self.seed)
-        bw = BoundedWalker(self.start, self.home, self.left_limit, self.right_limit)
+        if self.engine == 'numpy':
+            return self.run_bounded_simulation(1)[0]
+        return self._bounded_single_walk()[0]
+
+    def _bounded_single_walk(self):
+        self._seed()
+        return self._bounded_walk()
+
+    def _bounded_walk(self):
+        """
+        Walk from start to home using the current random state, returning
+        the number of steps and the number of random draws made. A walker
+        at a limit steps away from it without drawing.
+        """
+        if self.engine == 'block':
+            from vectorized_walks import block_walk
+            return block_walk(self.start, self.home, self.left_limit,
+                              self.right_limit, rng=self.rng,
+                              return_draws=True)
+        bw = BoundedWalker(self.start, self.home, self.left_limit,
+                           self.right_limit, self.rng)
         position = bw.get_position()
         while position != self.home:
             bw.bounded_move()
             position = bw.get_position()
-        return bw.get_steps()
+        return bw.get_steps(), bw.draws
 
     def run_bounded_simulation(self, num_walks):
         """
@@ -107,12 +154,117 @@ class BoundedSimulation(Simulation):
         list[int]
             List with the number of steps per walk
         """
+        return self._instrumented(lambda: self._cached(
+            'run_bounded_simulation', num_walks,
+            lambda: self._run_bounded_simulation(num_walks)))
+
+    def _run_bounded_simulation(self, num_walks):
+        if self.engine == 'numpy':
+            from vectorized_walks import population_walks
+            steps, draws = population_walks(self.start, self.home, num_walks,
+                                            self._numpy_seed(),
+                                            self.left_limit, self.right_limit,
+                                            return_draws=True)
+            return [self._record(walk, drawn)
+                    for walk, drawn in zip(steps.tolist(), draws.tolist())]
+        if self.independent_streams:
+            self._seed()
+            return [self._record(*self._bounded_walk())
+                    for _ in range(num_walks)]
         total_steps = []
         for _ in range(0, num_walks):
-            simulation = self.bounded_single_walk()
-            total_steps.append(simulation)
+            simulation = self._bounded_single_walk()
+            total_steps.append(self._record(*simulation))
         return total_steps
 
+    def _cache_parameters(self):
+        return (self.start, self.home, self.seed, self.left_limit,
+                self.right_limit)
+
+    def _check_limits(self):
+        for position in (self.start, self.home):
+            if not self.left_limit <= position <= self.right_limit:
+                raise ValueError(
+                    'Position {0} is outside the limits {1} and {2}'.format(
+                        position, self.left_limit, self.right_limit))
+
+    def expected_steps(self):
+        """
+        Exact expected number of steps of a walk from start to home.
+
+        Only the limit on the far side of home from the start affects the
+        walk. With ``d`` the distance from that limit to home and ``x`` the
+        distance from it to the start, the expected number of steps ``E(x)``
+        solves ``E(x) = 1 + (E(x - 1) + E(x + 1)) / 2`` with ``E(0) = 1 +
+        E(1)`` at the limit and ``E(d) = 0`` at home, which gives
+        ``E(x) = d ** 2 - x ** 2``.
+
+        Returns
+        -------
+        int
+            The expected number of steps
+
+        Raises
+        ------
+        ValueError
+            If start or home lies outside the limits
+        """
+        self._check_limits()
+        if self.start < self.home:
+            return ((self.home - self.left_limit) ** 2
+                    - (self.start - self.left_limit) ** 2)
+        return ((self.right_limit - self.home) ** 2
+                - (self.right_limit - self.start) ** 2)
+
+    def step_distribution(self, horizon):
+        """
+        Exact distribution of the number of steps of a walk from start to
+        home, up to a horizon.
+
+        Arguments
+        ---------
+        horizon : int
+            The largest number of steps to compute the probability of
+
+        Returns
+        -------
+        np.ndarray
+            Array of length ``horizon + 1`` where element ``n`` is the
+            probability that the walk takes exactly ``n`` steps
+
+        Raises
+        ------
+        ValueError
+            If start or home lies outside the limits
+        """
+        import numpy as np
+
+        self._check_limits()
+        pmf = np.zeros(horizon + 1)
+        if self.start == self.home:
+            pmf[0] = 1
+            return pmf
+
+        # States are distances from the limit behind the start, the last
+        # state being home.
+        if self.start < self.home:
+            width = self.home - self.left_limit
+            state = np.zeros(width + 1)
+            state[self.start - self.left_limit] = 1
+        else:
+            width = self.right_limit - self.home
+            state = np.zeros(width + 1)
+            state[self.right_limit - self.start] = 1
+        for steps in range(1, horizon + 1):
+            moved = np.zeros_like(state)
+            moved[1] = state[0]
+            moved[:-2] += state[1:-1] / 2
+            moved[2:] += state[1:-1] / 2
+            pmf[steps] = moved[-1]
+            moved[-1] = 0
+            state = moved
+        return pmf
+
 
 if __name__ == "__main__":
     left = [0, -10, -100, -1000, -10000]
@@ -120,3 +272,5 @@ if __name__ == "__main__":
         bs = BoundedSimulation(0, 20, 12345, i, 20)
         bs_results = bs.run_bounded_simulation(20)
         print('Left boundary: {0}. Total steps: {1}'.format(i, bs_results))
+        print('Left boundary: {0}. Expected steps: {1}'.format(
+            i, bs.expected_steps()))
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+"""
+Parallel parameter sweeps over bounded walk simulations.
+
+Every cell of a sweep is one ``BoundedSimulation``. Cells are run on a
+process pool with the longest expected cells first, cells expected to take
+much longer than the others are split into parts with fewer walks, and
+results are reported as soon as all parts of a cell are done.
+"""
+
+import collections
+import csv
+import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bounded_sim import BoundedSimulation
+
+SweepCell = collections.namedtuple(
+    'SweepCell', 'start home left_limit right_limit seed num_walks')
+
+RESULT_FIELDS = SweepCell._fields + ('expected_steps', 'mean_steps', 'steps')
+
+# Cells expected to take more steps than this are split into several tasks.
+MAX_TASK_STEPS = 10 ** 8
+
+
+def sweep_tasks(grid, max_task_steps=MAX_TASK_STEPS):
+    """
+    Split the cells of a sweep into tasks, longest expected task first.
+
+    Arguments
+    ---------
+    grid : iterable
+        Cells given as ``SweepCell`` or as tuples of
+        ``(start, home, left_limit, right_limit, seed, num_walks)``
+    max_task_steps : int
+        Cells expected to take more steps than this are split by walks
+
+    Returns
+    -------
+    cells : list[SweepCell]
+        The cells of the sweep
+    tasks : list[tuple]
+        ``(cell_index, part, num_parts, num_walks)`` for each task
+    """
+    cells = [SweepCell(*cell) for cell in grid]
+    tasks = []
+    for index, cell in enumerate(cells):
+        walk_steps = BoundedSimulation(cell.start, cell.home, cell.seed,
+                                       cell.left_limit, cell.right_limit
+                                       ).expected_steps()
+        num_parts = max(1, min(cell.num_walks, math.ceil(
+            walk_steps * cell.num_walks / max_task_steps)))
+        for part in range(num_parts):
+            num_walks = (cell.num_walks // num_parts
+                         + (part < cell.num_walks % num_parts))
+            tasks.append((walk_steps * num_walks, index, part, num_parts,
+                          num_walks))
+    tasks.sort(key=lambda task: -task[0])
+    return cells, [task[1:] for task in tasks]
+
+
+def _run_task(cell, part, num_parts, num_walks, engine):
+    seed = cell.seed
+    if engine == 'numpy' and num_parts > 1:
+        seed = [cell.seed, part]
+    simulation = BoundedSimulation(cell.start, cell.home, seed,
+                                   cell.left_limit, cell.right_limit, engine)
+    return simulation.run_bounded_simulation(num_walks)
+
+
+def iter_sweep(grid, workers=None, engine='walk',
+               max_task_steps=MAX_TASK_STEPS):
+    """
+    Run a sweep, yielding the result of each cell as soon as it is done.
+
+    The parts of a split cell are run with the same seed, except with the
+    numpy engine, where part ``i`` of a cell with seed ``s`` is seeded with
+    ``[s, i]``. The result of a cell thus only depends on the cell and on
+    ``max_task_steps``, not on the number of workers.
+
+    Arguments
+    ---------
+    grid : iterable
+        Cells given as ``SweepCell`` or as tuples of
+        ``(start, home, left_limit, right_limit, seed, num_walks)``
+    workers : int
+        The number of processes, None for as many as there are CPUs
+    engine : str
+        The ``BoundedSimulation`` engine
+    max_task_steps : int
+        Cells expected to take more steps than this are split by walks
+
+    Yields
+    ------
+    SweepCell
+        The cell
+    list[int]
+        The number of steps of each walk in the cell
+    """
+    cells, tasks = sweep_tasks(grid, max_task_steps)
+    parts = {}
+    if workers == 1:
+        results = ((task, _run_task(cells[task[0]], *task[1:], engine))
+                   for task in tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        futures = {pool.submit(_run_task, cells[task[0]], *task[1:], engine):
+                   task for task in tasks}
+        results = ((futures[future], future.result())
+                   for future in as_completed(futures))
+
+    try:
+        for (index, part, num_parts, _), steps in results:
+            parts.setdefault(index, {})[part] = steps
+            if len(parts[index]) == num_parts:
+                cell_parts = parts.pop(index)
+                yield cells[index], [walk for part in range(num_parts)
+                                     for walk in cell_parts[part]]
+    finally:
+        if workers != 1:
+            pool.shutdown(cancel_futures=True)
+
+
+def run_sweep(grid, path, workers=None, engine='walk',
+              max_task_steps=MAX_TASK_STEPS):
+    """
+    Run a sweep, writing one CSV row per cell as soon as it is done.
+
+    Each row holds the cell parameters, the exact expected number of steps,
+    the mean number of steps and the steps of each walk separated by spaces.
+
+    Arguments
+    ---------
+    grid : iterable
+        Cells given as ``SweepCell`` or as tuples of
+        ``(start, home, left_limit, right_limit, seed, num_walks)``
+    path : str
+        The CSV file to write
+    workers : int
+        The number of processes, None for as many as there are CPUs
+    engine : str
+        The ``BoundedSimulation`` engine
+    max_task_steps : int
+        Cells expected to take more steps than this are split by walks
+    """
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(RESULT_FIELDS)
+        for cell, steps in iter_sweep(grid, workers, engine, max_task_steps):
+            expected = BoundedSimulation(cell.start, cell.home, cell.seed,
+                                         cell.left_limit, cell.right_limit
+                                         ).expected_steps()
+            mean = sum(steps) / len(steps) if steps else None
+            writer.writerow(cell + (expected, mean,
+                                    ' '.join(map(str, steps))))
+            csv_file.flush()
+
+
+if __name__ == "__main__":
+    left = [0, -10, -100, -1000, -10000]
+    run_sweep([(0, 20, i, 20, 12345, 20) for i in left],
+              'bounded_sweep.csv', engine='numpy')
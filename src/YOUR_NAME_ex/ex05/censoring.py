@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+"""
+Censored walks and survival statistics.
+
+A walk stopped by a step cap before reaching home is reported as
+``CensoredSteps``, an ``int`` holding the number of steps taken with a
+``censored`` flag. Censored walks still count as plain step counts in
+arithmetic, but ignoring the flag underestimates long walks; the
+Kaplan-Meier estimator below takes it into account.
+"""
+
+
+class CensoredSteps(int):
+    """
+    Number of steps of a walk stopped before it reached home.
+    """
+
+    censored = True
+
+    def __repr__(self):
+        return 'CensoredSteps({0})'.format(int(self))
+
+
+def is_censored(steps):
+    """Tell whether a number of steps belongs to a censored walk."""
+    return getattr(steps, 'censored', False)
+
+
+def kaplan_meier(walks):
+    """
+    Kaplan-Meier estimate of the survival function of the number of steps.
+
+    Arguments
+    ---------
+    walks : iterable of int
+        The number of steps of each walk, ``CensoredSteps`` for censored
+        walks
+
+    Returns
+    -------
+    list[tuple]
+        ``(steps, survival)`` for every number of steps at which a walk
+        reached home, where ``survival`` estimates the probability that a
+        walk takes more than ``steps`` steps
+    """
+    events = {}
+    censored = {}
+    for steps in walks:
+        counts = censored if is_censored(steps) else events
+        counts[int(steps)] = counts.get(int(steps), 0) + 1
+
+    at_risk = sum(events.values()) + sum(censored.values())
+    survival = 1.0
+    curve = []
+    for steps in sorted(set(events) | set(censored)):
+        finished = events.get(steps, 0)
+        if finished:
+            survival *= 1 - finished / at_risk
+            curve.append((steps, survival))
+        at_risk -= finished + censored.get(steps, 0)
+    return curve
+
+
+def censored_summary(walks):
+    """
+    Summarise walks, some of which may be censored.
+
+    Arguments
+    ---------
+    walks : iterable of int
+        The number of steps of each walk, ``CensoredSteps`` for censored
+        walks
+
+    Returns
+    -------
+    dict
+        The number of walks and of censored walks, the Kaplan-Meier median
+        number of steps, None if fewer than half of the walks are known to
+        have reached home, and the estimated probability that a walk takes
+        more steps than the longest walk that reached home
+    """
+    walks = list(walks)
+    curve = kaplan_meier(walks)
+    median = next((steps for steps, survival in curve if survival <= 0.5),
+                  None)
+    return {'walks': len(walks),
+            'censored': sum(1 for steps in walks if is_censored(steps)),
+            'median': median,
+            'tail_probability': curve[-1][1] if curve else 1.0}
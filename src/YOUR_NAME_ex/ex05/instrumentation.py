@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+"""
+Opt-in instrumentation of walk simulations.
+
+An ``Instrumentation`` passed to a simulation records the wall time of each
+run, the number of walks, steps and random draws, and a histogram of the
+number of steps per walk, which is updated as walks finish. Simulations
+without one only pay for an ``is None`` test per run and per walk.
+
+Only a duck-typed ``start_run``, ``record_walk`` and ``end_run`` are used by
+the simulations, so any object offering them can take its place.
+"""
+
+import collections
+import time
+
+RunStatistics = collections.namedtuple('RunStatistics',
+                                       'walks steps draws wall_time')
+
+
+class Instrumentation:
+    """
+    Collector of statistics over the runs of one or more simulations.
+    """
+
+    def __init__(self, callback=None, every=None):
+        """
+        Initialise the instrumentation
+
+        Arguments
+        ---------
+        callback : callable
+            Called with the instrumentation after each walk which takes the
+            total number of steps past one or more multiples of ``every``
+        every : int
+            The number of steps between callbacks
+        """
+        if callback is not None and (every is None or every < 1):
+            raise ValueError('A callback needs a positive step interval')
+        self.callback = callback
+        self.every = every
+        self.runs = []
+        self.histogram = collections.Counter()
+        self.walks = 0
+        self.steps = 0
+        self.draws = 0
+        self.censored = 0
+        self._run_start = None
+        self._run_walks = 0
+        self._run_steps = 0
+        self._run_draws = 0
+
+    def start_run(self):
+        """Start timing a run."""
+        self._run_walks = self._run_steps = self._run_draws = 0
+        self._run_start = time.perf_counter()
+
+    def record_walk(self, steps, draws=None):
+        """
+        Record a finished walk.
+
+        Arguments
+        ---------
+        steps : int
+            The number of steps of the walk
+        draws : int
+            The number of random draws made by the walk, None if unknown.
+            The draw count of a run with any unknown walk is None.
+        """
+        self.histogram[steps] += 1
+        if getattr(steps, 'censored', False):
+            self.censored += 1
+        self._run_walks += 1
+        self._run_steps += steps
+        if draws is None or self._run_draws is None:
+            self._run_draws = None
+        else:
+            self._run_draws += draws
+        if (self.callback is not None and
+                (self.steps + self._run_steps) // self.every
+                > (self.steps + self._run_steps - steps) // self.every):
+            self.callback(self)
+
+    def end_run(self, walks=()):
+        """
+        Stop timing a run.
+
+        Arguments
+        ---------
+        walks : list[int]
+            The number of steps of every walk of the run. Walks beyond those
+            already recorded with ``record_walk`` are recorded now, with an
+            unknown number of draws.
+        """
+        wall_time = time.perf_counter() - self._run_start
+        for steps in walks[self._run_walks:]:
+            self.record_walk(steps)
+        self.runs.append(RunStatistics(self._run_walks, self._run_steps,
+                                       self._run_draws, wall_time))
+        self.walks += self._run_walks
+        self.steps += self._run_steps
+        if self._run_draws is None or self.draws is None:
+            self.draws = None
+        else:
+            self.draws += self._run_draws
+        self._run_start = None
+
+    @property
+    def wall_time(self):
+        """Total wall time of the runs in seconds."""
+        return sum(run.wall_time for run in self.runs)
+
+    @property
+    def steps_per_second(self):
+        """Steps walked per second of wall time."""
+        wall_time = self.wall_time
+        return self.steps / wall_time if wall_time > 0 else float('nan')
+
+    def summary(self):
+        """
+        Summarise the recorded runs.
+
+        Returns
+        -------
+        dict
+            The number of runs, walks, censored walks, steps and draws, the
+            wall time and the steps per second. Draws are None if any walk
+            was recorded without its draw count.
+        """
+        return {'runs': len(self.runs), 'walks': self.walks,
+                'censored': self.censored,
+                'steps': self.steps, 'draws': self.draws,
+                'wall_time': self.wall_time,
+                'steps_per_second': self.steps_per_second}
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+"""
+Random walks on an N-dimensional lattice.
+
+In every step a walker moves one cell along one axis, every one of the
+``2 * N`` directions being equally likely. The walk ends when the walker
+enters its home region. The lattice may be bounded by a box with
+reflecting walls, where a step out of the box is turned back into it, or
+absorbing walls, where a step out of the box ends the walk away from home.
+"""
+
+import numpy as np
+
+from censoring import CensoredSteps
+from walker_sim import Simulation
+
+BOUNDARIES = ('reflecting', 'absorbing')
+
+
+class HomeRegion:
+    """
+    Set of lattice cells, with constant time membership tests.
+
+    The region is stored as its bounding box, plus a bitmap over the box
+    unless the region fills all of it.
+    """
+
+    def __init__(self, lower, upper, bitmap=None):
+        """
+        Initialise the region
+
+        Arguments
+        ---------
+        lower : sequence of int
+            The smallest coordinates of the bounding box
+        upper : sequence of int
+            The largest coordinates of the bounding box
+        bitmap : np.ndarray
+            Boolean array with one element per cell of the bounding box,
+            True for the cells in the region. All cells of the box are in the
+            region if not given.
+        """
+        self.lower = np.asarray(lower, dtype=np.int64)
+        self.upper = np.asarray(upper, dtype=np.int64)
+        if np.any(self.upper < self.lower):
+            raise ValueError('Empty home region')
+        self.bitmap = bitmap
+
+    @classmethod
+    def point(cls, point):
+        """Region made of a single cell."""
+        return cls(point, point)
+
+    @classmethod
+    def box(cls, lower, upper):
+        """Region made of all cells between two corners, both included."""
+        return cls(lower, upper)
+
+    @classmethod
+    def cells(cls, cells):
+        """Region made of the given cells."""
+        cells = np.atleast_2d(np.asarray(cells, dtype=np.int64))
+        lower, upper = cells.min(axis=0), cells.max(axis=0)
+        bitmap = np.zeros(tuple(upper - lower + 1), dtype=bool)
+        bitmap[tuple((cells - lower).T)] = True
+        return cls(lower, upper, bitmap)
+
+    def intersects(self, lower, upper):
+        """
+        Tell whether the region has a cell inside a box.
+
+        Arguments
+        ---------
+        lower : sequence of int
+            The smallest coordinates of the box
+        upper : sequence of int
+            The largest coordinates of the box
+
+        Returns
+        -------
+        bool
+        """
+        first = np.maximum(self.lower, lower)
+        last = np.minimum(self.upper, upper)
+        if np.any(first > last):
+            return False
+        if self.bitmap is None:
+            return True
+        window = tuple(slice(low, high + 1) for low, high
+                       in zip(first - self.lower, last - self.lower))
+        return bool(self.bitmap[window].any())
+
+    @property
+    def dimension(self):
+        return len(self.lower)
+
+    def contains(self, positions):
+        """
+        Tell which positions are in the region.
+
+        Arguments
+        ---------
+        positions : np.ndarray
+            Array of shape ``(num_walkers, dimension)``
+
+        Returns
+        -------
+        np.ndarray
+            Boolean array, True for the positions in the region
+        """
+        inside = np.all((positions >= self.lower) & (positions <= self.upper),
+                        axis=1)
+        if self.bitmap is None or not inside.any():
+            return inside
+        offsets = positions[inside] - self.lower
+        inside[inside] = self.bitmap[tuple(offsets.T)]
+        return inside
+
+
+class LatticeSimulation(Simulation):
+    """
+    class simulating walks on an N-dimensional lattice from start to home
+
+    ``run_simulation`` returns the number of steps of each walk, None for
+    walks ended by an absorbing wall and ``CensoredSteps`` for walks stopped
+    at ``max_steps``.
+    """
+
+    def __init__(self, start, home, seed, bounds=None,
+                 boundary='reflecting', max_steps=None):
+        """
+        Initialise the simulation
+
+        Arguments
+        ---------
+        start : sequence of int
+            The walker's initial cell
+        home : HomeRegion or sequence of int
+            The walk ends when the walker enters this region or cell
+        seed : int
+            Seed for the ``np.random.default_rng`` moving the walkers
+        bounds : sequence of (int, int)
+            The smallest and largest coordinate along each axis, None for an
+            unbounded lattice
+        boundary : str
+            ``'reflecting'`` or ``'absorbing'`` walls
+        max_steps : int
+            If given, walks are stopped after this many steps. Needed on an
+            unbounded lattice of three or more dimensions, where some
+            walkers never reach home.
+
+        Raises
+        ------
+        ValueError
+            If the walks could go on forever: home lies outside the bounds,
+            or the lattice is unbounded in three or more dimensions without
+            ``max_steps``
+        """
+        if not isinstance(home, HomeRegion):
+            home = HomeRegion.point(home)
+        super().__init__(tuple(start), home, seed, engine='numpy',
+                         max_steps=max_steps)
+        if len(self.start) != home.dimension:
+            raise ValueError('Start and home have different dimensions')
+        if boundary not in BOUNDARIES:
+            raise ValueError('Unknown boundary {0!r}, expected one of {1}'
+                             .format(boundary, BOUNDARIES))
+        if bounds is not None:
+            bounds = np.asarray(bounds, dtype=np.int64)
+            if bounds.shape != (len(self.start), 2):
+                raise ValueError('Need one (low, high) pair per axis')
+            if np.any(bounds[:, 0] >= bounds[:, 1]):
+                raise ValueError('Every axis needs low < high')
+            if np.any((self.start < bounds[:, 0])
+                      | (self.start > bounds[:, 1])):
+                raise ValueError('Start is outside the bounds')
+            if not home.intersects(bounds[:, 0], bounds[:, 1]):
+                raise ValueError('Home is outside the bounds')
+        elif len(self.start) >= 3 and max_steps is None:
+            raise ValueError('Walks on an unbounded lattice of {0} dimensions '
+                             'need max_steps'.format(len(self.start)))
+        self.bounds = bounds
+        self.boundary = boundary
+
+    def _cache_parameters(self):
+        bounds = None if self.bounds is None else self.bounds.tolist()
+        cells = None
+        if self.home.bitmap is not None:
+            cells = np.argwhere(self.home.bitmap).tolist()
+        return (self.start, self.home.lower.tolist(),
+                self.home.upper.tolist(), cells, self.seed, bounds,
+                self.boundary)
+
+    def run_population(self, num_walks):
+        """
+        Walk a population of independent walkers from start until they
+        reach home, are absorbed or have taken ``max_steps`` steps.
+
+        Arguments
+        ---------
+        num_walks : int
+            The number of walkers
+
+        Returns
+        -------
+        steps : np.ndarray
+            The number of steps taken by each walker
+        at_home : np.ndarray
+            Boolean array, True for walkers which reached home
+        censored : np.ndarray
+            Boolean array, True for walkers stopped at ``max_steps``
+        """
+        rng = np.random.default_rng(self.seed)
+        dimension = len(self.start)
+        steps = np.zeros(num_walks, dtype=np.int64)
+        at_home = np.zeros(num_walks, dtype=bool)
+
+        walkers = np.arange(num_walks)
+        positions = np.tile(np.asarray(self.start, dtype=np.int64),
+                            (num_walks, 1))
+        done = self.home.contains(positions)
+        at_home[done] = True
+        walkers, positions = walkers[~done], positions[~done]
+        censored = np.zeros(num_walks, dtype=bool)
+        taken = 0
+        while walkers.size > 0:
+            if taken == self.max_steps:
+                steps[walkers] = taken
+                censored[walkers] = True
+                break
+            rows = np.arange(walkers.size)
+            directions = rng.integers(0, 2 * dimension, size=walkers.size)
+            axes = directions // 2
+            signs = 2 * (directions % 2) - 1
+            positions[rows, axes] += signs
+            taken += 1
+
+            absorbed = np.zeros(walkers.size, dtype=bool)
+            if self.bounds is not None:
+                moved = positions[rows, axes]
+                outside = ((moved < self.bounds[axes, 0])
+                           | (moved > self.bounds[axes, 1]))
+                if self.boundary == 'reflecting':
+                    positions[rows[outside], axes[outside]] -= (
+                        2 * signs[outside])
+                else:
+                    absorbed = outside
+
+            home_now = ~absorbed & self.home.contains(positions)
+            done = home_now | absorbed
+            if done.any():
+                steps[walkers[done]] = taken
+                at_home[walkers[home_now]] = True
+                walkers, positions = walkers[~done], positions[~done]
+        return steps, at_home, censored
+
+    def _run_simulation(self, num_walks):
+        # Every walker draws one direction per step. Walks ended by an
+        # absorbing wall are recorded with the steps they took.
+        steps, at_home, censored = self.run_population(num_walks)
+        walks = []
+        for walk, home, stopped in zip(steps.tolist(), at_home, censored):
+            result = (walk if home else
+                      CensoredSteps(walk) if stopped else None)
+            self._record(walk if result is None else result, walk)
+            walks.append(result)
+        return walks
+
+
+if __name__ == "__main__":
+    S1 = LatticeSimulation((0, 0), HomeRegion.box((5, -2), (6, 2)), 12345,
+                           bounds=[(-10, 10), (-10, 10)])
+    print(S1.run_simulation(20))
+    S2 = LatticeSimulation((0, 0, 0), (3, 3, 3), 12345,
+                           bounds=[(-5, 5)] * 3, boundary='absorbing')
+    print(S2.run_simulation(20))
@@ -1,8 +1,69 @@
 # -*- coding: utf-8 -*-
+import copy
 
 __author__ = 'Kevin Martin Lankut'
 __email__ = 'kela@nmbu.no'
 
+# random_block advances at most this many lanes at once, which keeps its
+# working arrays in the CPU cache.
+BLOCK_LANES = 2 ** 14
+
+# fill converts numbers to the buffer's type through a scratch array of at
+# most this many numbers.
+FILL_CHUNK = 2 ** 16
+
+
+def _writable_array(buffer):
+    """
+    View a writable buffer as a flat NumPy array, without copying it.
+
+    Buffers of bytes are viewed as ``uint32`` numbers.
+
+    Raises
+    ------
+    ValueError
+        If the buffer is read-only, not contiguous or cannot hold 31 bit
+        numbers
+    """
+    import numpy as np
+
+    if isinstance(buffer, np.ndarray):
+        array = buffer
+    else:
+        array = np.asarray(memoryview(buffer))
+    if not array.flags.writeable:
+        raise ValueError('Buffer is read-only')
+    if not array.flags.c_contiguous:
+        raise ValueError('Buffer is not contiguous')
+    array = array.reshape(-1)
+    if array.dtype.itemsize == 1:
+        if array.size % 4:
+            raise ValueError('Byte buffer length is not a multiple of 4')
+        return array.view(np.uint32)
+    if not (array.dtype.kind in 'iu' and array.dtype.itemsize >= 4
+            or array.dtype.kind == 'f' and array.dtype.itemsize >= 8):
+        raise ValueError('Buffer of {0} cannot hold 31 bit numbers'
+                         .format(array.dtype))
+    return array
+
+
+def _reduce_mersenne(values, scratch):
+    """
+    Reduce, in place, products of two residues modulo ``2 ** 31 - 1``.
+
+    As ``2 ** 31`` is one modulo ``2 ** 31 - 1``, folding the bits above
+    bit 31 onto the low bits keeps the residue. Three folds bring any
+    product of two residues into ``[1, 2 ** 31 - 2]``, provided the product
+    is not a multiple of the modulus.
+    """
+    import numpy as np
+
+    low_bits = 2 ** 31 - 1
+    for _ in range(3):
+        np.right_shift(values, 31, out=scratch)
+        np.bitwise_and(values, low_bits, out=values)
+        values += scratch
+
 
 class LCGRand:
     slope = 7 ** 5
@@ -33,6 +94,164 @@ class LCGRand:
 
         return self._hidden_state
 
+    def random_block(self, n):
+        """
+        Generate a block of random numbers at once.
+
+        The first number is generated as by ``rand``. Every further stretch
+        of up to ``BLOCK_LANES`` numbers is the previous stretch multiplied
+        by ``slope ** k`` modulo ``congruence_class``, ``k`` being the
+        length of the stretch, so all lanes of a stretch advance at once.
+
+        Arguments
+        ---------
+        n : int
+            The number of random numbers to generate
+
+        Returns
+        -------
+        np.ndarray
+            Array of ``n`` ``int64`` random numbers, the same as ``n`` calls
+            to ``rand``
+        """
+        import numpy as np
+
+        block = np.empty(n, dtype=np.uint64)
+        self._generate(block)
+        return block.view(np.int64)
+
+    def _generate(self, block):
+        """Fill a ``uint64`` array with the next random numbers."""
+        import numpy as np
+
+        n = block.size
+        if n == 0:
+            return
+        block[0] = self.slope * self._hidden_state % self.congruence_class
+        scratch = np.empty(min(n, BLOCK_LANES), dtype=np.uint64)
+        filled = 1
+        while filled < n:
+            lanes = min(filled, BLOCK_LANES, n - filled)
+            stretch = block[filled:filled + lanes]
+            np.multiply(block[filled - lanes:filled],
+                        pow(self.slope, lanes, self.congruence_class),
+                        out=stretch)
+            if self.congruence_class == 2 ** 31 - 1:
+                _reduce_mersenne(stretch, scratch[:lanes])
+            else:
+                stretch %= self.congruence_class
+            filled += lanes
+        self._hidden_state = int(block[-1])
+
+    def fill(self, buffer):
+        """
+        Write the next random numbers into a buffer.
+
+        The buffer may be a NumPy array, ``array.array``, ``bytearray``,
+        ``memoryview`` or any other writable, contiguous buffer. Buffers of
+        bytes are filled with ``uint32`` numbers. Arrays of 64 bit integers
+        are written directly, other buffers through a scratch array of at
+        most ``FILL_CHUNK`` numbers.
+
+        Arguments
+        ---------
+        buffer : writable buffer
+            The buffer to fill
+
+        Returns
+        -------
+        int
+            The number of random numbers written
+        """
+        import numpy as np
+
+        target = _writable_array(buffer)
+        if target.dtype in (np.int64, np.uint64):
+            self._generate(target.view(np.uint64))
+            return target.size
+        scratch = np.empty(min(target.size, FILL_CHUNK), dtype=np.uint64)
+        for first in range(0, target.size, FILL_CHUNK):
+            chunk = scratch[:min(FILL_CHUNK, target.size - first)]
+            self._generate(chunk)
+            target[first:first + chunk.size] = chunk
+        return target.size
+
+    def random_chunks(self, chunk_size, count=None):
+        """
+        Generate random numbers in chunks.
+
+        Every chunk is a view of the same buffer, which is overwritten by
+        the next chunk, so copy a chunk to keep it.
+
+        Arguments
+        ---------
+        chunk_size : int
+            The number of random numbers per chunk
+        count : int
+            The total number of random numbers, infinite if not given
+
+        Yields
+        ------
+        np.ndarray
+            ``int64`` array of at most ``chunk_size`` random numbers
+        """
+        import numpy as np
+
+        buffer = np.empty(chunk_size, dtype=np.uint64)
+        while count is None or count > 0:
+            chunk = buffer if count is None else buffer[:min(chunk_size,
+                                                             count)]
+            self._generate(chunk)
+            if count is not None:
+                count -= chunk.size
+            yield chunk.view(np.int64)
+
+    def jump(self, n):
+        """
+        Advance the generator by ``n`` numbers in ``O(log n)`` time.
+
+        Arguments
+        ---------
+        n : int
+            The number of numbers to skip, negative to go back
+        """
+        self._hidden_state = (pow(self.slope, n, self.congruence_class)
+                              * self._hidden_state % self.congruence_class)
+
+    def split(self, k):
+        """
+        Split the sequence into non-overlapping substreams.
+
+        Generator ``i`` starts ``i * (congruence_class - 1) // k`` numbers
+        after the current position, so the substreams evenly divide the
+        period of the generator. The generator itself is not advanced.
+
+        Arguments
+        ---------
+        k : int
+            The number of substreams
+
+        Returns
+        -------
+        list[LCGRand]
+            The generators of the substreams
+        """
+        period = self.congruence_class - 1
+        generators = []
+        for i in range(k):
+            generator = copy.copy(self)
+            generator.jump(i * period // k)
+            generators.append(generator)
+        return generators
+
+    def getstate(self):
+        """Return the state of the generator, for use with ``setstate``."""
+        return self._hidden_state
+
+    def setstate(self, state):
+        """Restore a state returned by ``getstate``."""
+        self._hidden_state = state
+
     def random_sequence(self, length):
         return RandIter(self, length)
 
@@ -49,6 +268,105 @@ class LCGRand:
             yield self.rand()
 
 
+class LaneLCGRand:
+    """
+    Many independent ``LCGRand`` streams advanced together.
+
+    Each lane follows the sequence of ``LCGRand`` with its seed. The lanes
+    are held in a NumPy ``uint64`` array, where the product of a state and
+    the slope fits without overflow, so every call advances all lanes with a
+    few array operations.
+    """
+
+    slope = LCGRand.slope
+    congruence_class = LCGRand.congruence_class
+
+    def __init__(self, seeds):
+        """
+        Initialise the lanes
+
+        Arguments
+        ---------
+        seeds : sequence of int
+            The seed of each lane, as given to ``LCGRand``
+        """
+        import numpy as np
+
+        self._states = np.array([seed % self.congruence_class
+                                 for seed in seeds], dtype=np.uint64)
+        self._scratch = np.empty_like(self._states)
+
+    @classmethod
+    def split(cls, seed, k):
+        """
+        Create lanes following the substreams of ``LCGRand(seed).split(k)``.
+        """
+        return cls([generator.getstate()
+                    for generator in LCGRand(seed).split(k)])
+
+    def __len__(self):
+        return len(self._states)
+
+    def rand(self):
+        """
+        Generate a random number in every lane.
+
+        Returns
+        -------
+        np.ndarray
+            ``int64`` array with the next number of each lane
+        """
+        self._states *= self.slope
+        _reduce_mersenne(self._states, self._scratch)
+        return self._states.view('int64').copy()
+
+    def random_block(self, n):
+        """
+        Generate the next ``n`` numbers of every lane at once.
+
+        Arguments
+        ---------
+        n : int
+            The number of numbers per lane
+
+        Returns
+        -------
+        np.ndarray
+            ``int64`` array of shape ``(n, lanes)``, where row ``i`` is what
+            the ``i``-th call to ``rand`` would return
+        """
+        import numpy as np
+
+        lanes = len(self._states)
+        block = np.empty((n, lanes), dtype=np.uint64)
+        if n == 0 or lanes == 0:
+            return block.view(np.int64)
+        block[0] = self._states
+        block[0] *= self.slope
+        _reduce_mersenne(block[0], self._scratch)
+        max_rows = max(1, BLOCK_LANES // lanes)
+        scratch = np.empty((min(n, max_rows), lanes), dtype=np.uint64)
+        filled = 1
+        while filled < n:
+            rows = min(filled, max_rows, n - filled)
+            stretch = block[filled:filled + rows]
+            np.multiply(block[filled - rows:filled],
+                        pow(self.slope, rows, self.congruence_class),
+                        out=stretch)
+            _reduce_mersenne(stretch, scratch[:rows])
+            filled += rows
+        self._states[:] = block[-1]
+        return block.view(np.int64)
+
+    def getstate(self):
+        """Return the state of every lane, for use with ``setstate``."""
+        return self._states.tolist()
+
+    def setstate(self, state):
+        """Restore a state returned by ``getstate``."""
+        self._states[:] = state
+
+
 class RandIter:
     def __init__(self, random_number_generator, length):
         """
@@ -111,6 +429,70 @@ class RandIter:
         self.num_generated_numbers += 1
         return self.generator.rand()
 
+    def fill(self, buffer):
+        """
+        Write the next random numbers of the sequence into a buffer.
+
+        Uses the generator's ``fill`` method if it has one, and its ``rand``
+        method otherwise.
+
+        Arguments
+        ---------
+        buffer : writable buffer
+            The buffer to fill, see ``LCGRand.fill``
+
+        Returns
+        -------
+        int
+            The number of random numbers written, less than the size of the
+            buffer if the sequence ends first
+
+        Raises
+        ------
+        RuntimeError
+            If the ``fill`` method is called before ``__iter__``.
+        """
+        if self.num_generated_numbers is None:
+            raise RuntimeError(
+                'Cannot call ``fill`` before the RandIter is initialised'
+                ' as an iterator'
+            )
+        target = _writable_array(buffer)
+        target = target[:self.length - self.num_generated_numbers]
+        if hasattr(self.generator, 'fill'):
+            self.generator.fill(target)
+        else:
+            for i in range(target.size):
+                target[i] = self.generator.rand()
+        self.num_generated_numbers += target.size
+        return target.size
+
+    def chunks(self, chunk_size):
+        """
+        Generate the rest of the sequence in chunks.
+
+        Every chunk is a view of the same buffer, which is overwritten by
+        the next chunk, so copy a chunk to keep it.
+
+        Arguments
+        ---------
+        chunk_size : int
+            The number of random numbers per chunk
+
+        Yields
+        ------
+        np.ndarray
+            ``int64`` array of at most ``chunk_size`` random numbers
+        """
+        import numpy as np
+
+        buffer = np.empty(chunk_size, dtype=np.int64)
+        while True:
+            n = self.fill(buffer)
+            if n == 0:
+                return
+            yield buffer[:n]
+
 
 if __name__ == "__main__":
     generator = LCGRand(1)
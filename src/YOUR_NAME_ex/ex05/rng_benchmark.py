@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+"""
+Speed and quality benchmarks for the random number generators.
+
+Run ``python rng_benchmark.py`` to time the ex04 and ex05 ``LCGRand``, the
+``random`` module and NumPy with scalar, iterator and batched access, run
+statistical tests on a long stream from each generator and write a JSON
+report. Run ``python rng_benchmark.py --compare OLD NEW`` to compare the
+speed in two reports.
+
+The statistical tests read the streams in chunks of ``CHUNK_SIZE`` numbers
+and only keep running totals, so memory use does not depend on the number of
+samples. Each test gives a statistic which is approximately standard normal
+or chi-square distributed for a good generator, and its p-value.
+"""
+
+import argparse
+import importlib.util
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from myrand import LCGRand
+
+GENERATORS = ('lcg_ex05', 'lcg_ex04', 'random', 'numpy')
+SPEED_NUMBERS = {'scalar': 10 ** 6, 'iterator': 10 ** 6,
+                 'infinite_iterator': 10 ** 6, 'batch': 10 ** 7}
+QUALITY_SAMPLES = 10 ** 8
+CHUNK_SIZE = 2 ** 20
+
+# Parameters of the statistical tests
+UNIFORMITY_BINS = 1024
+GAP_RANGE = (0.0, 0.5)
+GAP_CLASSES = 16
+
+EX04_MYRAND = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, 'ex04', 'myrand.py')
+
+
+def load_ex04_lcg():
+    """
+    Load ``LCGRand`` from ex04, whose module name clashes with ex05's.
+
+    Returns
+    -------
+    type or None
+        The ex04 ``LCGRand``, None if ex04 is not found
+    """
+    spec = importlib.util.spec_from_file_location('ex04_myrand', EX04_MYRAND)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except FileNotFoundError:
+        return None
+    return module.LCGRand
+
+
+def speed_cases(name, seed):
+    """
+    Ways of drawing numbers from a generator.
+
+    Arguments
+    ---------
+    name : str
+        One of ``GENERATORS``
+    seed : int
+        Generator seed
+
+    Returns
+    -------
+    dict
+        Maps access modes to functions drawing ``n`` numbers
+    """
+    if name == 'lcg_ex05':
+        generator = LCGRand(seed)
+
+        def scalar(n):
+            rand = generator.rand
+            for _ in range(n):
+                rand()
+
+        def iterator(n):
+            for _ in generator.random_sequence(n):
+                pass
+
+        def infinite_iterator(n):
+            for _ in itertools.islice(generator.infinite_random_sequence(),
+                                      n):
+                pass
+        return {'scalar': scalar, 'iterator': iterator,
+                'infinite_iterator': infinite_iterator,
+                'batch': generator.random_block}
+    if name == 'lcg_ex04':
+        lcg = load_ex04_lcg()
+        if lcg is None:
+            return {}
+        generator = lcg(seed)
+
+        def scalar(n):
+            rand = generator.rand
+            for _ in range(n):
+                rand()
+        return {'scalar': scalar}
+    if name == 'random':
+        generator = random.Random(seed)
+
+        def scalar(n):
+            getrandbits = generator.getrandbits
+            for _ in range(n):
+                getrandbits(31)
+        return {'scalar': scalar,
+                'batch': lambda n: generator.randbytes(4 * n)}
+    if name == 'numpy':
+        generator = np.random.default_rng(seed)
+
+        def scalar(n):
+            integers = generator.integers
+            for _ in range(n):
+                integers(0, 2 ** 31)
+        return {'scalar': scalar,
+                'batch': lambda n: generator.integers(0, 2 ** 31, n)}
+    raise ValueError('Unknown generator {0!r}, expected one of {1}'
+                     .format(name, GENERATORS))
+
+
+def uniform_source(name, seed):
+    """
+    Build a function drawing uniform numbers in ``[0, 1)`` from a generator.
+
+    Arguments
+    ---------
+    name : str
+        One of ``GENERATORS``
+    seed : int
+        Generator seed
+
+    Returns
+    -------
+    callable or None
+        ``draw(n)`` returning an array of ``n`` numbers, None if the
+        generator is not available
+    """
+    if name == 'lcg_ex05':
+        generator = LCGRand(seed)
+        modulus = LCGRand.congruence_class
+        return lambda n: generator.random_block(n) / modulus
+    if name == 'lcg_ex04':
+        lcg = load_ex04_lcg()
+        if lcg is None:
+            return None
+        generator = lcg(seed)
+        modulus = generator.m
+        return lambda n: np.fromiter(
+            (generator.rand() for _ in range(n)), np.float64, n) / modulus
+    if name == 'random':
+        generator = random.Random(seed)
+        return lambda n: (np.frombuffer(generator.randbytes(4 * n),
+                                        dtype=np.uint32) >> 1) / 2 ** 31
+    if name == 'numpy':
+        generator = np.random.default_rng(seed)
+        return lambda n: generator.integers(0, 2 ** 31, n) / 2 ** 31
+    raise ValueError('Unknown generator {0!r}, expected one of {1}'
+                     .format(name, GENERATORS))
+
+
+def normal_p_value(z):
+    """Two-sided p-value of a standard normal statistic."""
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def chi_square_p_value(statistic, dof):
+    """
+    Upper tail p-value of a chi-square statistic, by the Wilson-Hilferty
+    normal approximation, which is accurate for the many degrees of freedom
+    used here.
+    """
+    z = (((statistic / dof) ** (1 / 3) - (1 - 2 / (9 * dof)))
+         / math.sqrt(2 / (9 * dof)))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def chi_square(observed, expected):
+    """Chi-square statistic of observed against expected counts."""
+    observed = np.asarray(observed, dtype=np.float64)
+    return float(np.sum((observed - expected) ** 2 / expected))
+
+
+class StreamTests:
+    """
+    Running totals of the statistical tests over a stream read in chunks.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.bins = np.zeros(UNIFORMITY_BINS, dtype=np.int64)
+        self.total = 0.0
+        self.total_squares = 0.0
+        self.total_products = 0.0
+        self.first = None
+        self.last = None
+        self.gaps = np.zeros(GAP_CLASSES + 1, dtype=np.int64)
+        self.last_hit = None
+        self.above = 0
+        self.runs = 0
+
+    def update(self, chunk):
+        """
+        Add a chunk of the stream.
+
+        Arguments
+        ---------
+        chunk : np.ndarray
+            Uniform numbers in ``[0, 1)``
+        """
+        if chunk.size == 0:
+            return
+        self.bins += np.bincount((chunk * UNIFORMITY_BINS).astype(np.int64),
+                                 minlength=UNIFORMITY_BINS)
+
+        self.total += float(chunk.sum())
+        self.total_squares += float(np.dot(chunk, chunk))
+        self.total_products += float(np.dot(chunk[:-1], chunk[1:]))
+        if self.last is not None:
+            self.total_products += self.last * float(chunk[0])
+        else:
+            self.first = float(chunk[0])
+
+        hits = np.flatnonzero((chunk >= GAP_RANGE[0])
+                              & (chunk < GAP_RANGE[1])) + self.count
+        if hits.size:
+            if self.last_hit is not None:
+                hits = np.concatenate(([self.last_hit], hits))
+            gaps = np.minimum(np.diff(hits) - 1, GAP_CLASSES)
+            self.gaps += np.bincount(gaps, minlength=GAP_CLASSES + 1)
+            self.last_hit = int(hits[-1])
+
+        above = chunk >= 0.5
+        self.above += int(np.count_nonzero(above))
+        self.runs += int(np.count_nonzero(above[1:] != above[:-1]))
+        if self.last is None:
+            self.runs += 1
+        elif (self.last >= 0.5) != above[0]:
+            self.runs += 1
+
+        self.last = float(chunk[-1])
+        self.count += chunk.size
+
+    def results(self):
+        """
+        Finish the tests.
+
+        Returns
+        -------
+        list[dict]
+            For each test its name, statistic and p-value
+        """
+        n = self.count
+        expected = n / UNIFORMITY_BINS
+        uniformity = chi_square(self.bins, expected)
+
+        # Knuth's serial correlation coefficient, closing the stream into a
+        # cycle, which is approximately normal with variance 1 / n.
+        products = self.total_products + self.last * self.first
+        correlation = ((n * products - self.total ** 2)
+                       / (n * self.total_squares - self.total ** 2))
+        correlation_z = correlation * math.sqrt(n)
+
+        p = GAP_RANGE[1] - GAP_RANGE[0]
+        probabilities = np.append(p * (1 - p) ** np.arange(GAP_CLASSES),
+                                  (1 - p) ** GAP_CLASSES)
+        num_gaps = int(self.gaps.sum())
+        gap = chi_square(self.gaps, num_gaps * probabilities)
+
+        # Wald-Wolfowitz runs of numbers above and below one half
+        below = n - self.above
+        runs_mean = 2 * self.above * below / n + 1
+        runs_variance = ((runs_mean - 1) * (runs_mean - 2) / (n - 1))
+        runs_z = (self.runs - runs_mean) / math.sqrt(runs_variance)
+
+        return [
+            {'test': 'chi_square_uniformity', 'statistic': uniformity,
+             'p_value': chi_square_p_value(uniformity, UNIFORMITY_BINS - 1)},
+            {'test': 'serial_correlation', 'statistic': correlation_z,
+             'p_value': normal_p_value(correlation_z)},
+            {'test': 'gap', 'statistic': gap,
+             'p_value': chi_square_p_value(gap, GAP_CLASSES)},
+            {'test': 'runs', 'statistic': runs_z,
+             'p_value': normal_p_value(runs_z)},
+        ]
+
+
+def quality_tests(draw, samples, chunk_size=CHUNK_SIZE):
+    """
+    Run the statistical tests on a stream.
+
+    Arguments
+    ---------
+    draw : callable
+        ``draw(n)`` returns the next ``n`` uniform numbers in ``[0, 1)``
+    samples : int
+        The length of the stream
+    chunk_size : int
+        The number of numbers drawn at a time
+
+    Returns
+    -------
+    list[dict]
+        For each test its name, statistic and p-value
+    """
+    tests = StreamTests()
+    for first in range(0, samples, chunk_size):
+        tests.update(draw(min(chunk_size, samples - first)))
+    return tests.results()
+
+
+def bench_speed(name, mode, draw, numbers, repeat):
+    """Time drawing ``numbers`` numbers from a generator."""
+    seconds = min(_elapsed(draw, numbers) for _ in range(repeat))
+    return {'generator': name, 'mode': mode, 'numbers': numbers,
+            'seconds': seconds, 'numbers_per_sec': numbers / seconds}
+
+
+def _elapsed(draw, numbers):
+    start = time.perf_counter()
+    draw(numbers)
+    return time.perf_counter() - start
+
+
+# git_commit, the report layout, compare and main follow pa01/benchmark.py.
+# Loading that module would import snakes_and_ladders and need pa01 on
+# sys.path, so the few shared lines are repeated rather than shared.
+def git_commit():
+    """Return the current git commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(generators=GENERATORS, speed_numbers=SPEED_NUMBERS,
+                   samples=QUALITY_SAMPLES, seed=1, repeat=3, report=print):
+    """
+    Run the speed and quality benchmarks.
+
+    Arguments
+    ---------
+    generators : iterable of str
+        The generators to benchmark
+    speed_numbers : dict
+        The number of numbers to time for each access mode
+    samples : int
+        The length of the stream tested for each generator, no tests if 0
+    seed : int
+        Generator seed
+    repeat : int
+        Each speed benchmark reports the fastest of ``repeat`` runs
+    report : callable
+        Called with a line of text after each benchmark
+
+    Returns
+    -------
+    dict
+        Machine information, speed results and test results
+    """
+    speed, quality = [], []
+    for name in generators:
+        for mode, draw in speed_cases(name, seed).items():
+            result = bench_speed(name, mode, draw, speed_numbers[mode],
+                                 repeat)
+            speed.append(result)
+            report('{generator} {mode}: {numbers_per_sec:.3g} numbers/s'
+                   .format(**result))
+        draw = uniform_source(name, seed)
+        if samples and draw is not None:
+            for result in quality_tests(draw, samples):
+                result['generator'] = name
+                quality.append(result)
+                report('{generator} {test}: statistic {statistic:.4g}, '
+                       'p-value {p_value:.4f}'.format(**result))
+
+    return {'commit': git_commit(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0], 'machine': platform.platform(),
+            'samples': samples, 'seed': seed, 'speed': speed,
+            'quality': quality}
+
+
+def compare(old, new):
+    """
+    Compare the speed in two reports.
+
+    Arguments
+    ---------
+    old, new : dict
+        Reports from ``run_benchmarks``
+
+    Returns
+    -------
+    list[tuple]
+        ``(generator, mode, speedup)`` for every benchmark present in both,
+        where the speedup is the new rate divided by the old rate
+    """
+    old_rates = {(result['generator'], result['mode']):
+                 result['numbers_per_sec'] for result in old['speed']}
+    return [(result['generator'], result['mode'],
+             result['numbers_per_sec'] / old_rates[result['generator'],
+                                                   result['mode']])
+            for result in new['speed']
+            if (result['generator'], result['mode']) in old_rates]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Speed and quality benchmarks for the random number '
+                    'generators.')
+    parser.add_argument('--output', default='rng_benchmark.json',
+                        help='file the report is written to')
+    parser.add_argument('--generators', nargs='+', default=list(GENERATORS),
+                        choices=GENERATORS)
+    parser.add_argument('--samples', type=int, default=QUALITY_SAMPLES,
+                        help='length of the tested streams, 0 to skip tests')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiply the number of timed numbers by this')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two reports instead of running')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as old_file:
+            old = json.load(old_file)
+        with open(args.compare[1]) as new_file:
+            new = json.load(new_file)
+        for generator, mode, speedup in compare(old, new):
+            print('{0} {1}: {2:.2f}x'.format(generator, mode, speedup))
+        return
+
+    speed_numbers = {mode: max(1, int(numbers * args.scale))
+                     for mode, numbers in SPEED_NUMBERS.items()}
+    results = run_benchmarks(args.generators, speed_numbers, args.samples,
+                             args.seed, args.repeat)
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
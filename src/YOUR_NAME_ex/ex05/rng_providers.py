@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+"""
+Random number providers for the walk simulations.
+
+A provider offers two methods, both with inclusive bounds like
+``random.randint``:
+
+``randint(a, b)``
+    a single random integer ``a <= x <= b``
+``integers(a, b, n)``
+    a NumPy array of ``n`` such integers
+
+The ``random`` module and ``random.Random`` instances already offer
+``randint``, so they serve as scalar-only providers wherever only
+``randint`` is used. ``as_provider`` wraps the ``random`` module, NumPy
+generators and generators with a ``rand`` method, such as ``LCGRand`` and
+``ListRand``, into full providers.
+"""
+
+import random
+
+import numpy as np
+
+
+def _to_range(values, a, b):
+    """Map raw generator output onto ``[a, b]``, keeping values in range."""
+    return a + (values - a) % (b - a + 1)
+
+
+class RandomProvider:
+    """
+    Provider drawing from the ``random`` module or a ``random.Random``.
+    """
+
+    def __init__(self, generator=random):
+        self.generator = generator
+
+    def randint(self, a, b):
+        return self.generator.randint(a, b)
+
+    def integers(self, a, b, n):
+        """Draw as ``n`` calls to ``randint`` would."""
+        randint = self.generator.randint
+        return np.array([randint(a, b) for _ in range(n)], dtype=np.int64)
+
+
+class RandProvider:
+    """
+    Provider drawing from a generator with a ``rand`` method, such as
+    ``LCGRand`` or ``ListRand``.
+
+    Each number ``v`` from ``rand`` becomes ``a + (v - a) % (b - a + 1)``,
+    so a ``ListRand`` of numbers already in ``[a, b]`` is replayed as is.
+    Batches use the generator's ``random_block`` if it has one, and are
+    the same as repeated ``randint`` calls either way.
+    """
+
+    def __init__(self, generator):
+        self.generator = generator
+
+    def randint(self, a, b):
+        return _to_range(self.generator.rand(), a, b)
+
+    def integers(self, a, b, n):
+        if hasattr(self.generator, 'random_block'):
+            # Blocks may be unsigned, as from a trace, which cannot hold a
+            # negative lower bound.
+            values = self.generator.random_block(n).astype(np.int64)
+        else:
+            rand = self.generator.rand
+            values = np.array([rand() for _ in range(n)], dtype=np.int64)
+        return _to_range(values, a, b)
+
+
+class NumpyProvider:
+    """
+    Provider drawing from a NumPy ``Generator``.
+    """
+
+    def __init__(self, generator):
+        self.generator = generator
+
+    def randint(self, a, b):
+        return int(self.generator.integers(a, b, endpoint=True))
+
+    def integers(self, a, b, n):
+        return self.generator.integers(a, b, size=n, endpoint=True)
+
+
+def as_provider(generator):
+    """
+    Wrap a random number generator into a provider.
+
+    Arguments
+    ---------
+    generator : object
+        A provider, the ``random`` module, a ``random.Random``, a NumPy
+        ``Generator`` or an object with a ``rand`` method
+
+    Returns
+    -------
+    object
+        A provider offering ``randint`` and ``integers``
+
+    Raises
+    ------
+    ValueError
+        If the generator is of none of these kinds
+    """
+    if isinstance(generator, np.random.Generator):
+        return NumpyProvider(generator)
+    if generator is random or isinstance(generator, random.Random):
+        return RandomProvider(generator)
+    if hasattr(generator, 'randint') and hasattr(generator, 'integers'):
+        return generator
+    if hasattr(generator, 'rand'):
+        return RandProvider(generator)
+    raise ValueError('Cannot draw random numbers from {0!r}'
+                     .format(generator))
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import csv
+import math
+
+import pytest
+
+from bounded_sim import BoundedSimulation
+from bounded_sweep import iter_sweep, run_sweep, sweep_tasks
+from walk_cache import WalkCache
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+
+@pytest.mark.parametrize('engine', ['walk', 'block', 'numpy'])
+@pytest.mark.parametrize('start, home, left, right', [(0, 20, 0, 20),
+                                                      (-3, 5, -10, 40),
+                                                      (4, 1, -5, 6)])
+def test_bounded_engines_mean(engine, start, home, left, right):
+    """Test that both engines give the exact mean number of steps."""
+    if engine != 'numpy':
+        num_walks = 300
+        walks = [BoundedSimulation(start, home, seed, left, right, engine)
+                 .bounded_single_walk() for seed in range(num_walks)]
+    else:
+        num_walks = 20000
+        walks = BoundedSimulation(start, home, 1, left, right, engine
+                                  ).run_bounded_simulation(num_walks)
+    exact = BoundedSimulation(start, home, 1, left, right).expected_steps()
+    mean = sum(walks) / num_walks
+    stdev = math.sqrt(sum((walk - mean) ** 2 for walk in walks)
+                      / (num_walks - 1))
+    assert abs(mean - exact) < 5 * stdev / math.sqrt(num_walks)
+
+
+def test_numpy_engine_stays_within_limits():
+    """Test that walkers starting at a limit move away from it."""
+    s = BoundedSimulation(0, 1, 3, 0, 10, engine='numpy')
+    assert s.run_bounded_simulation(100) == [1] * 100
+    s = BoundedSimulation(10, 9, 3, 0, 10, engine='numpy')
+    assert s.run_bounded_simulation(100) == [1] * 100
+
+
+def test_invalid_engine_and_limits():
+    """Test that invalid engines and limits raise ValueError."""
+    with pytest.raises(ValueError):
+        BoundedSimulation(0, 5, 1, -5, 5, engine='first_passage')
+    with pytest.raises(ValueError):
+        BoundedSimulation(0, 10, 1, -5, 5, engine='numpy'
+                          ).run_bounded_simulation(1)
+
+
+def test_expected_steps():
+    """Test the exact expected number of steps in simple cases."""
+    assert BoundedSimulation(0, 20, 1, 0, 20).expected_steps() == 400
+    assert BoundedSimulation(19, 20, 1, 0, 20).expected_steps() == 39
+    assert BoundedSimulation(5, 5, 1, 0, 20).expected_steps() == 0
+    assert BoundedSimulation(3, 0, 1, -7, 3).expected_steps() == 9
+    with pytest.raises(ValueError):
+        BoundedSimulation(0, 30, 1, -5, 20).expected_steps()
+
+
+def test_step_distribution():
+    """Test that the exact step distribution agrees with the expected
+    number of steps and with the numpy engine."""
+    s = BoundedSimulation(2, 6, 1, -3, 10)
+    pmf = s.step_distribution(5000)
+    assert abs(pmf.sum() - 1) < 1e-12
+    assert abs(pmf @ range(len(pmf)) - s.expected_steps()) < 1e-9
+    assert pmf[4] == 1 / 16
+
+    walks = BoundedSimulation(2, 6, 1, -3, 10, engine='numpy'
+                              ).run_bounded_simulation(20000)
+    for steps in (4, 10, 40):
+        exact = pmf[:steps + 1].sum()
+        empirical = sum(walk <= steps for walk in walks) / 20000
+        assert abs(empirical - exact) < 4 * math.sqrt(exact / 20000)
+
+
+def test_sweep_tasks_longest_first():
+    """Test that long cells are split and tasks are ordered by expected
+    length."""
+    grid = [(0, 20, 0, 20, 1, 10), (0, 20, -100, 20, 1, 10)]
+    cells, tasks = sweep_tasks(grid, max_task_steps=10000)
+    assert tasks[0][0] == 1
+    assert sum(task[3] for task in tasks if task[0] == 1) == 10
+    assert all(task[2] == 1 for task in tasks if task[0] == 0)
+
+
+@pytest.mark.parametrize('engine', ['walk', 'numpy'])
+def test_sweep_independent_of_workers(engine, tmp_path):
+    """Test that the sweep gives the same results with one or several
+    workers and writes one row per cell."""
+    grid = [(0, 5, left, 5, 12, 6) for left in (0, -5, -20)]
+    serial = dict(iter_sweep(grid, workers=1, engine=engine,
+                             max_task_steps=500))
+    parallel = dict(iter_sweep(grid, workers=2, engine=engine,
+                               max_task_steps=500))
+    assert serial == parallel
+    assert all(len(steps) == 6 for steps in serial.values())
+
+    path = tmp_path / 'sweep.csv'
+    run_sweep(grid, str(path), workers=1, engine=engine, max_task_steps=500)
+    with open(path) as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert sorted(int(row['left_limit']) for row in rows) == [-20, -5, 0]
+
+
+def test_bounded_cache_keys_include_limits():
+    """Test that simulations differing only in their limits are cached
+    separately."""
+    cache = WalkCache()
+    near = BoundedSimulation(0, 5, 1, -2, 5, cache=cache)
+    far = BoundedSimulation(0, 5, 1, -50, 5, cache=cache)
+    assert near.run_bounded_simulation(3) == BoundedSimulation(
+        0, 5, 1, -2, 5).run_bounded_simulation(3)
+    assert far.run_bounded_simulation(3) == BoundedSimulation(
+        0, 5, 1, -50, 5).run_bounded_simulation(3)
+    assert cache.misses == 2
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+
+import numpy as np
+import pytest
+
+from bounded_sim import BoundedSimulation
+from censoring import is_censored
+from instrumentation import Instrumentation
+from lattice_sim import HomeRegion, LatticeSimulation
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+
+def test_home_region_contains():
+    """Points, boxes and cell sets contain exactly their cells."""
+    positions = np.array([[0, 0], [1, 2], [2, 2], [3, 0], [-1, 1]])
+    point = HomeRegion.point((1, 2))
+    box = HomeRegion.box((0, 0), (2, 2))
+    cells = HomeRegion.cells([(0, 0), (2, 2), (3, 0)])
+    assert point.contains(positions).tolist() == [False, True, False,
+                                                  False, False]
+    assert box.contains(positions).tolist() == [True, True, True,
+                                                False, False]
+    assert cells.contains(positions).tolist() == [True, False, True,
+                                                  True, False]
+
+
+def test_cells_region_walks_like_box():
+    """A box given cell by cell gives the same walks as the box."""
+    cells = list(itertools.product(range(3, 5), range(-1, 2)))
+    bounds = [(-6, 6), (-6, 6)]
+    box = LatticeSimulation((0, 0), HomeRegion.box((3, -1), (4, 1)), 7,
+                            bounds)
+    by_cell = LatticeSimulation((0, 0), HomeRegion.cells(cells), 7, bounds)
+    assert box.run_simulation(50) == by_cell.run_simulation(50)
+
+
+def test_reflecting_line_matches_bounded_simulation():
+    """On a line, reflecting walls give the BoundedWalker mean."""
+    expected = BoundedSimulation(0, 5, 1, -5, 5).expected_steps()
+    steps = LatticeSimulation((0,), (5,), 1, [(-5, 5)]).run_simulation(4000)
+    assert np.mean(steps) == pytest.approx(expected, rel=0.06)
+
+
+def test_absorbing_line_reaches_home_like_gamblers_ruin():
+    """On a line, absorbing walls end the walks with the ruin odds."""
+    steps, at_home, censored = LatticeSimulation(
+        (0,), (5,), 2, [(-5, 5)], 'absorbing').run_population(4000)
+    assert not censored.any()
+    assert at_home.mean() == pytest.approx(6 / 11, abs=0.03)
+    assert np.all(steps > 0)
+
+
+def test_walks_stay_inside_reflecting_bounds():
+    """A walker in a small 3-D box always finds home."""
+    simulation = LatticeSimulation((0, 0, 0), (2, 2, 2), 3,
+                                   [(0, 2)] * 3)
+    assert None not in simulation.run_simulation(200)
+    assert simulation.single_walk() > 0
+
+
+def test_lattice_invalid_input():
+    """Mismatched dimensions, bad bounds and boundaries are rejected."""
+    with pytest.raises(ValueError):
+        LatticeSimulation((0, 0), (1, 1, 1), 1)
+    with pytest.raises(ValueError):
+        LatticeSimulation((0, 0), (1, 1), 1, [(0, 0), (0, 2)])
+    with pytest.raises(ValueError):
+        LatticeSimulation((5, 0), (1, 1), 1, [(0, 2), (0, 2)])
+    with pytest.raises(ValueError):
+        LatticeSimulation((0, 0), (1, 1), 1, boundary='sticky')
+
+
+def test_home_outside_bounds_is_rejected():
+    """Homes no walker can reach are rejected."""
+    bounds = [(-10, 10), (-10, 10)]
+    with pytest.raises(ValueError):
+        LatticeSimulation((0, 0), (20, 20), 1, bounds)
+    with pytest.raises(ValueError):
+        LatticeSimulation((0, 0), HomeRegion.cells([(11, 0), (-10, 12)]), 1,
+                          bounds)
+    LatticeSimulation((0, 0), HomeRegion.cells([(11, 0), (10, 0)]), 1,
+                      bounds)
+
+
+def test_unbounded_high_dimensions_need_max_steps():
+    """Transient unbounded walks must be capped, and are censored."""
+    with pytest.raises(ValueError):
+        LatticeSimulation((0, 0, 0), (1, 0, 0), 1)
+    steps, at_home, censored = LatticeSimulation(
+        (0, 0, 0), (1, 0, 0), 1, max_steps=200).run_population(50)
+    assert censored.any() and at_home.any()
+    assert not np.any(at_home & censored)
+    assert np.all(steps[censored] == 200)
+    walks = LatticeSimulation((0, 0, 0), (1, 0, 0), 1,
+                              max_steps=200).run_simulation(50)
+    assert [is_censored(walk) for walk in walks] == censored.tolist()
+
+
+def test_instrumented_absorbing_walks():
+    """Test that absorbed walks are recorded with one draw per step."""
+    instrumentation = Instrumentation()
+    simulation = LatticeSimulation((0,), (3,), 7, bounds=[(-3, 3)],
+                                   boundary='absorbing')
+    simulation.instrumentation = instrumentation
+    walks = simulation.run_simulation(50)
+    assert None in walks
+    assert instrumentation.walks == 50
+    assert instrumentation.draws == instrumentation.steps
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+import array
+
+import numpy as np
+import pytest
+
+from myrand import BLOCK_LANES, FILL_CHUNK, LaneLCGRand, LCGRand, RandIter
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+
+@pytest.mark.parametrize('seed', [1, 346, 2 ** 31 - 2, 5 * (2 ** 31 - 1) + 3])
+def test_random_block_matches_rand(seed):
+    """Test that blocks continue the sequence of repeated rand calls."""
+    blocks, single = LCGRand(seed), LCGRand(seed)
+    for n in (0, 1, 2, 3, 17, 2 * BLOCK_LANES + 5):
+        assert (blocks.random_block(n).tolist()
+                == [single.rand() for _ in range(n)])
+    assert blocks.rand() == single.rand()
+
+
+def test_jump_matches_repeated_rand():
+    """Test that jumping ahead skips exactly n numbers, and back again."""
+    jumping, single = LCGRand(346), LCGRand(346)
+    jumping.jump(1000)
+    for _ in range(1000):
+        single.rand()
+    assert jumping.rand() == single.rand()
+    jumping.jump(-1)
+    single.jump(-1)
+    assert jumping.rand() == single.rand()
+
+
+def test_split_gives_evenly_spaced_streams():
+    """Test that split substreams start at evenly spaced offsets."""
+    generator = LCGRand(7)
+    state = generator.getstate()
+    streams = generator.split(4)
+    assert generator.getstate() == state
+    period = LCGRand.congruence_class - 1
+    for i, stream in enumerate(streams):
+        expected = LCGRand(7)
+        expected.jump(i * period // 4)
+        assert stream.rand() == expected.rand()
+    assert len({stream.getstate() for stream in streams}) == 4
+
+
+def test_getstate_setstate():
+    """Test that restoring a state repeats the sequence."""
+    generator = LCGRand(5)
+    state = generator.getstate()
+    first = [generator.rand() for _ in range(5)]
+    generator.setstate(state)
+    assert [generator.rand() for _ in range(5)] == first
+
+
+@pytest.mark.parametrize('buffer', [
+    bytearray(4 * 1000), array.array('l', [0] * 1000),
+    array.array('I', [0] * 1000), np.zeros((10, 100), dtype=np.int32),
+    np.zeros(1000, dtype=np.float64), np.zeros(1000, dtype=np.int64)])
+def test_fill_writes_into_buffer(buffer):
+    """Test that fill writes the sequence into writable buffers in place."""
+    generator, single = LCGRand(3), LCGRand(3)
+    assert generator.fill(buffer) == 1000
+    written = np.asarray(memoryview(buffer)).reshape(-1)
+    if written.dtype.itemsize == 1:
+        written = written.view(np.uint32)
+    assert written.tolist() == [single.rand() for _ in range(1000)]
+    assert generator.rand() == single.rand()
+
+
+def test_fill_rejects_unsuitable_buffers():
+    """Test that fill refuses buffers it cannot write numbers into."""
+    for buffer in (bytes(8), bytearray(6), np.zeros(4, dtype=np.int16),
+                   np.zeros((4, 4), dtype=np.int64)[:, 0]):
+        with pytest.raises(ValueError):
+            LCGRand(1).fill(buffer)
+
+
+def test_random_chunks_reuse_one_buffer():
+    """Test that chunks continue the sequence as views of one buffer."""
+    expected = LCGRand(3).random_block(FILL_CHUNK + 10).tolist()
+    chunks = list(LCGRand(3).random_chunks(FILL_CHUNK // 2 + 1,
+                                           FILL_CHUNK + 10))
+    assert [len(chunk) for chunk in chunks] == [FILL_CHUNK // 2 + 1] * 2 + [8]
+    assert all(np.shares_memory(chunks[0], chunk) for chunk in chunks)
+    numbers = []
+    for chunk in LCGRand(3).random_chunks(100, FILL_CHUNK + 10):
+        numbers.extend(chunk.tolist())
+    assert numbers == expected
+
+
+def test_rand_iter_fill_and_chunks():
+    """Test that RandIter fills and chunks stop at the sequence length."""
+    expected = LCGRand(3).random_block(250).tolist()
+    sequence = LCGRand(3).random_sequence(250)
+    with pytest.raises(RuntimeError):
+        sequence.fill(np.zeros(10, dtype=np.int64))
+    iter(sequence)
+    first = np.zeros(100, dtype=np.int64)
+    assert sequence.fill(first) == 100
+    rest = [chunk.tolist() for chunk in sequence.chunks(60)]
+    assert first.tolist() + sum(rest, []) == expected
+    assert [len(chunk) for chunk in rest] == [60, 60, 30]
+
+
+def test_rand_iter_fill_uses_rand_without_fill():
+    """Test that RandIter fills from generators which only have rand."""
+    class Counter:
+        def __init__(self):
+            self.count = 0
+
+        def rand(self):
+            self.count += 1
+            return self.count
+
+    sequence = RandIter(Counter(), 5)
+    iter(sequence)
+    buffer = array.array('i', [0] * 8)
+    assert sequence.fill(buffer) == 5
+    assert buffer.tolist() == [1, 2, 3, 4, 5, 0, 0, 0]
+
+
+def test_lanes_follow_lcgrand_streams():
+    """Test that every lane follows LCGRand with the lane's seed."""
+    seeds = [1, 346, 2 ** 31 - 2, 5 * (2 ** 31 - 1) + 3, 7]
+    lanes, singles = LaneLCGRand(seeds), [LCGRand(seed) for seed in seeds]
+    assert len(lanes) == len(seeds)
+    for _ in range(3):
+        assert lanes.rand().tolist() == [single.rand() for single in singles]
+    block = lanes.random_block(BLOCK_LANES)
+    assert block.shape == (BLOCK_LANES, len(seeds))
+    for lane, single in zip(block.T, singles):
+        assert lane.tolist() == single.random_block(BLOCK_LANES).tolist()
+    assert lanes.rand().tolist() == [single.rand() for single in singles]
+
+
+def test_lanes_split_and_state():
+    """Test split lanes and restoring the lane states."""
+    lanes = LaneLCGRand.split(7, 3)
+    streams = LCGRand(7).split(3)
+    state = lanes.getstate()
+    first = lanes.rand().tolist()
+    assert first == [stream.rand() for stream in streams]
+    lanes.setstate(state)
+    assert lanes.rand().tolist() == first
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+import rng_benchmark as rb
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+
+def test_quality_tests_do_not_depend_on_chunking():
+    """Test that running totals over chunks give the one-shot results."""
+    stream = np.random.default_rng(2).random(50000)
+
+    def source():
+        position = [0]
+
+        def draw(n):
+            position[0] += n
+            return stream[position[0] - n:position[0]]
+        return draw
+
+    whole = rb.quality_tests(source(), stream.size, chunk_size=stream.size)
+    chunked = rb.quality_tests(source(), stream.size, chunk_size=777)
+    for one, other in zip(whole, chunked):
+        assert one['test'] == other['test']
+        assert one['statistic'] == pytest.approx(other['statistic'])
+
+
+def test_quality_tests_pass_good_and_fail_bad_streams():
+    """Test that a good generator passes and a patterned stream fails."""
+    good = rb.quality_tests(rb.uniform_source('lcg_ex05', 1), 200000)
+    assert all(result['p_value'] > 1e-4 for result in good)
+
+    rng = np.random.default_rng(3)
+    sticky = np.repeat(rng.random(100000), 2)
+    bad = rb.quality_tests(lambda n: sticky[:n], sticky.size)
+    p_values = {result['test']: result['p_value'] for result in bad}
+    assert p_values['serial_correlation'] < 1e-6
+    assert p_values['runs'] < 1e-6
+    assert p_values['gap'] < 1e-6
+
+
+def test_run_benchmarks_report():
+    """Test that a small benchmark run gives a comparable report."""
+    numbers = {mode: 1000 for mode in rb.SPEED_NUMBERS}
+    report = rb.run_benchmarks(rb.GENERATORS, numbers, samples=10000,
+                               repeat=1, report=lambda line: None)
+    modes = {(result['generator'], result['mode'])
+             for result in report['speed']}
+    assert ('lcg_ex05', 'batch') in modes
+    assert ('lcg_ex04', 'scalar') in modes
+    assert len(report['quality']) == 4 * len(rb.GENERATORS)
+    assert len(rb.compare(report, report)) == len(report['speed'])
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import random
+
+import numpy as np
+import pytest
+
+from bounded_sim import BoundedSimulation
+from myrand import LCGRand
+from rng_providers import (NumpyProvider, RandProvider, RandomProvider,
+                           as_provider)
+from walker_sim import Simulation, Walker
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+
+class ListRand:
+    """Replays a list of numbers, like the ex04 ListRand."""
+
+    def __init__(self, numbers):
+        self.numbers = list(numbers)
+
+    def rand(self):
+        if not self.numbers:
+            raise RuntimeError()
+        return self.numbers.pop(0)
+
+
+@pytest.mark.parametrize('make', [
+    lambda: random.Random(3), lambda: LCGRand(3),
+    lambda: np.random.default_rng(3)])
+def test_providers_draw_in_range(make):
+    """Test that scalar and batched draws are inclusive of both bounds."""
+    provider = as_provider(make())
+    scalars = {provider.randint(-2, 2) for _ in range(200)}
+    batch = provider.integers(-2, 2, 1000)
+    assert scalars == set(batch.tolist()) == {-2, -1, 0, 1, 2}
+
+
+def test_as_provider_picks_adapters():
+    """Test that each kind of generator gets its adapter."""
+    assert isinstance(as_provider(random), RandomProvider)
+    assert isinstance(as_provider(LCGRand(1)), RandProvider)
+    assert isinstance(as_provider(np.random.default_rng()), NumpyProvider)
+    provider = as_provider(LCGRand(1))
+    assert as_provider(provider) is provider
+    with pytest.raises(ValueError):
+        as_provider(42)
+
+
+def test_batches_match_scalar_draws():
+    """Test that rand based batches equal repeated scalar draws."""
+    batched, scalar = as_provider(LCGRand(9)), as_provider(LCGRand(9))
+    assert (batched.integers(1, 6, 500).tolist()
+            == [scalar.randint(1, 6) for _ in range(500)])
+    replay = as_provider(ListRand([0, 1, 1, 0]))
+    assert replay.integers(0, 1, 4).tolist() == [0, 1, 1, 0]
+    with pytest.raises(RuntimeError):
+        replay.randint(0, 1)
+
+
+def test_walker_replays_list():
+    """Test that a walker moves as a replayed list tells it to."""
+    walker = Walker(0, 3, as_provider(ListRand([1, 1, 0, 1, 1])))
+    for _ in range(5):
+        walker.move()
+    assert walker.get_position() == 3
+
+
+@pytest.mark.parametrize('engine', ['walk', 'block'])
+def test_simulations_use_injected_generator(engine):
+    """Test that simulations draw from an injected generator, which is not
+    reseeded between walks."""
+    state = random.getstate()
+    walks = Simulation(0, 3, 1, engine, max_steps=2000,
+                       rng=LCGRand(5)).run_simulation(10)
+    bounded = BoundedSimulation(0, 3, 1, -3, 3, engine,
+                                rng=LCGRand(5)).run_bounded_simulation(10)
+    assert random.getstate() == state
+    assert len(set(walks)) > 1 and len(set(bounded)) > 1
+    assert walks == Simulation(0, 3, 1, engine, max_steps=2000,
+                               rng=LCGRand(5)).run_simulation(10)
+
+
+def test_numpy_engine_takes_generator():
+    """Test that the numpy engine draws from a given NumPy generator and
+    that engines refuse generators they cannot use."""
+    walks = Simulation(0, 2, 4, 'numpy', max_steps=1000,
+                       rng=np.random.default_rng(4)).run_simulation(20)
+    assert walks == Simulation(0, 2, 4, 'numpy',
+                               max_steps=1000).run_simulation(20)
+    with pytest.raises(ValueError):
+        Simulation(0, 2, 4, 'numpy', rng=LCGRand(4))
+    with pytest.raises(ValueError):
+        Simulation(0, 2, 4, 'first_passage', rng=random.Random(4))
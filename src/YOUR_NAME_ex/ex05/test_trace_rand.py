@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from myrand import LCGRand
+from rng_providers import as_provider
+from trace_rand import MappedListRand, record_trace
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+
+def test_trace_replays_recorded_numbers(tmp_path):
+    """Test that a recorded trace replays the generator's numbers."""
+    path = str(tmp_path / 'trace.bin')
+    record_trace(path, LCGRand(346), 1000)
+    expected = LCGRand(346).random_block(1000).tolist()
+    trace = MappedListRand(path)
+    assert len(trace) == 1000
+    assert [trace.rand() for _ in range(10)] == expected[:10]
+    assert trace.random_block(90).tolist() == expected[10:100]
+    trace.seek(995)
+    assert trace.tell() == 995
+    assert [trace.rand() for _ in range(5)] == expected[995:]
+    with pytest.raises(RuntimeError):
+        trace.rand()
+    trace.seek(990)
+    with pytest.raises(RuntimeError):
+        trace.random_block(11)
+    assert trace.tell() == 990
+
+
+def test_trace_dtypes_and_sources(tmp_path):
+    """Test narrow traces, generators without blocks and providers."""
+    class Counter:
+        def __init__(self):
+            self.count = 0
+
+        def rand(self):
+            self.count += 1
+            return self.count
+
+    path = str(tmp_path / 'trace.bin')
+    record_trace(path, Counter(), 6, dtype='<u4')
+    trace = MappedListRand(path, dtype='<u4')
+    assert trace.random_block(6).tolist() == [1, 2, 3, 4, 5, 6]
+    trace.seek(0)
+    assert as_provider(trace).integers(0, 1, 6).tolist() == [1, 0, 1, 0, 1, 0]
+    trace.seek(0)
+    assert as_provider(trace).integers(-2, 2, 5).tolist() == [1, 2, -2, -1, 0]
+
+
+def test_invalid_traces(tmp_path):
+    """Test empty, truncated and out of range uses of traces."""
+    empty = tmp_path / 'empty.bin'
+    empty.write_bytes(b'')
+    with pytest.raises(RuntimeError):
+        MappedListRand(str(empty)).rand()
+    truncated = tmp_path / 'truncated.bin'
+    truncated.write_bytes(np.arange(3, dtype='<i8').tobytes()[:-1])
+    with pytest.raises(ValueError):
+        MappedListRand(str(truncated))
+    with pytest.raises(ValueError):
+        MappedListRand(str(empty)).seek(1)
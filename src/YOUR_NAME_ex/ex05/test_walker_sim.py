@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+import math
+
+import pytest
+
+from bounded_sim import BoundedSimulation, BoundedWalker
+from censoring import (CensoredSteps, censored_summary, is_censored,
+                       kaplan_meier)
+from instrumentation import Instrumentation
+from vectorized_walks import BLOCK_SIZE
+from walk_cache import WalkCache
+from walker_population import WalkerPopulation
+from walker_sim import Simulation, Walker, first_passage_steps
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+
+def first_passage_cdf(distance, steps):
+    """Exact probability of reaching home within ``steps`` steps."""
+    return sum(distance / n * math.comb(n, (n + distance) // 2) / 2 ** n
+               for n in range(distance, steps + 1, 2))
+
+
+def test_first_passage_distance():
+    """Test that the sampled number of steps has the right parity and is at
+    least the distance."""
+    for distance in (0, 1, 2, 7):
+        for _ in range(100):
+            steps = first_passage_steps(distance)
+            assert steps >= distance
+            assert (steps - distance) % 2 == 0
+
+
+def test_first_passage_engine_is_seeded():
+    """Test that the first passage engine gives the same walk for the same
+    seed, as the step by step engine does."""
+    s = Simulation(10, 0, 12345, engine='first_passage')
+    assert s.run_simulation(3) == [s.single_walk()] * 3
+
+
+@pytest.mark.parametrize('distance', [1, 2])
+def test_engines_match_exact_distribution(distance):
+    """Test that both engines follow the exact first passage distribution,
+    checked at a few points of the cumulative distribution function."""
+    num_walks = 400
+    samples = {engine: [Simulation(0, distance, seed, engine).single_walk()
+                        for seed in range(num_walks)]
+               for engine in ('walk', 'block', 'first_passage')}
+    for steps in (distance, distance + 2, distance + 10, distance + 40):
+        exact = first_passage_cdf(distance, steps)
+        tolerance = 4 * math.sqrt(exact * (1 - exact) / num_walks) + 1e-9
+        for engine, walks in samples.items():
+            empirical = sum(walk <= steps for walk in walks) / num_walks
+            assert abs(empirical - exact) < tolerance, engine
+
+
+def test_unknown_engine():
+    """Test that an unknown engine raises ValueError."""
+    with pytest.raises(ValueError):
+        Simulation(0, 10, 1, engine='teleport')
+
+
+def test_numpy_engine_matches_exact_distribution():
+    """Test that the numpy engine follows the exact first passage
+    distribution."""
+    num_walks = 2000
+    walks = Simulation(5, 4, 1, engine='numpy').run_simulation(num_walks)
+    assert len(walks) == num_walks
+    for steps in (1, 3, 11, 41):
+        exact = first_passage_cdf(1, steps)
+        tolerance = 4 * math.sqrt(exact * (1 - exact) / num_walks)
+        empirical = sum(walk <= steps for walk in walks) / num_walks
+        assert abs(empirical - exact) < tolerance
+
+
+def test_numpy_engine_is_seeded():
+    """Test that the numpy engine gives the same walks for the same seed."""
+    s = Simulation(0, 10, 12345, engine='numpy')
+    assert s.run_simulation(50) == s.run_simulation(50)
+    assert s.single_walk() == s.run_simulation(1)[0]
+
+
+def test_independent_streams():
+    """Test that independent streams give different, reproducible walks."""
+    s = Simulation(0, 3, 12345, independent_streams=True)
+    walks = s.run_simulation(20)
+    assert walks == s.run_simulation(20)
+    assert len(set(walks)) > 1
+    assert walks[0] == Simulation(0, 3, 12345).single_walk()
+
+
+def test_cache(tmp_path):
+    """Test that cached results are returned from memory and from disk."""
+    cache = WalkCache(maxsize=1, directory=str(tmp_path))
+    s = Simulation(0, 5, 3, independent_streams=True, cache=cache)
+    walks = s.run_simulation(10)
+    assert cache.misses == 1
+    assert s.run_simulation(10) == walks
+    assert cache.hits == 1
+
+    other = Simulation(0, 5, 4, cache=cache).run_simulation(10)
+    assert other == Simulation(0, 5, 4).run_simulation(10)
+    fresh = WalkCache(directory=str(tmp_path))
+    assert Simulation(0, 5, 3, independent_streams=True,
+                      cache=fresh).run_simulation(10) == walks
+    assert fresh.hits == 1
+
+
+def test_walkers_have_no_instance_dict():
+    """Test that walkers store their state in slots."""
+    for walker in (Walker(0, 5), BoundedWalker(0, 5, -5, 5)):
+        assert not hasattr(walker, '__dict__')
+        walker.move()
+        assert walker.get_steps() == 1
+
+
+def test_walker_population():
+    """Test that a walker population can be used like a walker."""
+    population = WalkerPopulation(0, [2, -1, 0, 3], seed=1)
+    assert len(population) == 4
+    assert list(population.is_at_home()) == [False, False, True, False]
+    population.move()
+    assert list(population.get_steps()) == [1, 1, 0, 1]
+    assert all(abs(population.get_position()[:2]) == 1)
+    steps = population.walk_home()
+    assert population.is_at_home().all()
+    assert steps[2] == 0
+    assert all((steps - [2, 1, 0, 3]) % 2 == 0)
+    assert population.nbytes <= 16 * len(population)
+
+
+def test_instrumentation_records_runs():
+    """Test that instrumented runs record their walks and steps."""
+    calls = []
+    instrumentation = Instrumentation(callback=calls.append, every=50)
+    walks = Simulation(0, 3, 5, independent_streams=True,
+                       instrumentation=instrumentation).run_simulation(20)
+    numpy_walks = Simulation(0, 3, 5, engine='numpy',
+                             instrumentation=instrumentation
+                             ).run_simulation(20)
+    bounded = BoundedSimulation(0, 3, 5, -3, 3,
+                                instrumentation=instrumentation
+                                ).run_bounded_simulation(5)
+    everything = walks + numpy_walks + bounded
+    assert [run.walks for run in instrumentation.runs] == [20, 20, 5]
+    assert instrumentation.steps == sum(everything)
+    walk_draws, numpy_draws, bounded_draws = [run.draws for run
+                                              in instrumentation.runs]
+    assert walk_draws == sum(walks)
+    assert 64 * numpy_draws >= sum(numpy_walks)
+    assert 0 < bounded_draws <= sum(bounded)
+    assert instrumentation.draws == walk_draws + numpy_draws + bounded_draws
+    assert sorted(instrumentation.histogram.elements()) == sorted(everything)
+    assert 0 < len(calls) <= sum(everything) // 50
+    assert calls[0] is instrumentation
+    assert instrumentation.summary()['walks'] == 45
+    assert instrumentation.steps_per_second > 0
+
+
+def test_instrumentation_counts_first_passage_draws():
+    """Test that the first passage engine draws once per unit of distance."""
+    instrumentation = Instrumentation()
+    Simulation(0, 4, 5, engine='first_passage',
+               instrumentation=instrumentation).run_simulation(10)
+    assert instrumentation.draws == 40
+
+
+def test_instrumentation_counts_bounded_draws():
+    """Test that bounded walkers do not draw when stepping off a limit,
+    and that the block engine draws whole blocks of steps."""
+    instrumentation = Instrumentation()
+    walks = BoundedSimulation(0, 1, 5, 0, 1,
+                              instrumentation=instrumentation
+                              ).run_bounded_simulation(10)
+    assert walks == [1] * 10
+    assert instrumentation.draws == 0
+    BoundedSimulation(0, 3, 5, -3, 3, engine='block',
+                      instrumentation=instrumentation
+                      ).run_bounded_simulation(4)
+    assert instrumentation.runs[-1].draws % BLOCK_SIZE == 0
+    assert instrumentation.runs[-1].draws >= instrumentation.runs[-1].steps
+
+
+@pytest.mark.parametrize('engine', ['walk', 'block', 'first_passage',
+                                    'numpy'])
+def test_max_steps_censors_long_walks(engine):
+    """Test that every engine censors walks at max_steps with the exact
+    probability of not reaching home in time."""
+    num_walks, max_steps = 400, 30
+    walks = Simulation(0, 2, 3, engine, independent_streams=True,
+                       max_steps=max_steps).run_simulation(num_walks)
+    censored = [walk for walk in walks if is_censored(walk)]
+    assert all(walk == max_steps for walk in censored)
+    assert all(walk <= max_steps for walk in walks)
+    exact = 1 - first_passage_cdf(2, max_steps)
+    tolerance = 4 * math.sqrt(exact * (1 - exact) / num_walks)
+    assert abs(len(censored) / num_walks - exact) < tolerance
+
+
+def test_kaplan_meier():
+    """Test the Kaplan-Meier estimate against a worked example."""
+    walks = [1, 3, CensoredSteps(3), 5, CensoredSteps(6), 7]
+    steps, survival = zip(*kaplan_meier(walks))
+    assert steps == (1, 3, 5, 7)
+    assert survival == pytest.approx((5 / 6, 2 / 3, 4 / 9, 0))
+    summary = censored_summary(walks)
+    assert summary['censored'] == 2
+    assert summary['median'] == 5
+
+
+def test_cache_keeps_censoring(tmp_path):
+    """Test that censored walks stay censored in the on-disk cache."""
+    walks = Simulation(0, 5, 1, max_steps=10,
+                       cache=WalkCache(directory=str(tmp_path))
+                       ).run_simulation(5)
+    cached = Simulation(0, 5, 1, max_steps=10,
+                        cache=WalkCache(directory=str(tmp_path))
+                        ).run_simulation(5)
+    assert cached == walks
+    assert ([is_censored(walk) for walk in cached]
+            == [is_censored(walk) for walk in walks])
+    assert any(is_censored(walk) for walk in walks)
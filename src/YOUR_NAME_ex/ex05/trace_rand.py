@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+"""
+Replay of recorded random number traces.
+
+A trace is a binary file of fixed-width integers, ``TRACE_DTYPE`` unless
+stated otherwise, with no header. ``MappedListRand`` replays a trace like
+``ListRand`` replays a list, but maps the file into memory instead of
+reading it, so opening a trace takes the same time whatever its size, and
+only the parts that are read are loaded from disk.
+"""
+
+import os
+
+import numpy as np
+
+TRACE_DTYPE = '<i8'
+
+# record_trace draws at most this many numbers at a time.
+RECORD_CHUNK = 2 ** 20
+
+
+class MappedListRand:
+    """
+    Random number generator replaying a memory-mapped trace file.
+    """
+
+    def __init__(self, path, dtype=TRACE_DTYPE):
+        """
+        Open a trace
+
+        Arguments
+        ---------
+        path : str
+            The trace file
+        dtype : str or np.dtype
+            The type of the integers in the file
+
+        Raises
+        ------
+        ValueError
+            If the file size is not a multiple of the integer size
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        size = os.path.getsize(path)
+        if size % self.dtype.itemsize:
+            raise ValueError('Trace size {0} is not a multiple of {1} bytes'
+                             .format(size, self.dtype.itemsize))
+        if size == 0:
+            self._numbers = np.empty(0, dtype=self.dtype)
+        else:
+            self._numbers = np.memmap(path, dtype=self.dtype, mode='r')
+        self._index = 0
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def rand(self):
+        """
+        Return the next number of the trace.
+
+        Returns
+        -------
+        int
+            The number
+
+        Raises
+        ------
+        RuntimeError
+            If the trace is exhausted
+        """
+        if self._index >= len(self._numbers):
+            raise RuntimeError('Trace {0} is exhausted'.format(self.path))
+        self._index += 1
+        return int(self._numbers[self._index - 1])
+
+    def random_block(self, n):
+        """
+        Return the next ``n`` numbers of the trace.
+
+        Arguments
+        ---------
+        n : int
+            The number of numbers
+
+        Returns
+        -------
+        np.ndarray
+            Read-only view of the numbers in the mapped file
+
+        Raises
+        ------
+        RuntimeError
+            If fewer than ``n`` numbers are left, in which case none are read
+        """
+        if self._index + n > len(self._numbers):
+            raise RuntimeError('Trace {0} has {1} numbers left, not {2}'
+                               .format(self.path,
+                                       len(self._numbers) - self._index, n))
+        block = self._numbers[self._index:self._index + n]
+        self._index += n
+        return block
+
+    def seek(self, offset):
+        """
+        Move to a position in the trace.
+
+        Arguments
+        ---------
+        offset : int
+            The index of the next number to read
+
+        Raises
+        ------
+        ValueError
+            If the offset lies outside the trace
+        """
+        if not 0 <= offset <= len(self._numbers):
+            raise ValueError('Offset {0} is outside a trace of {1} numbers'
+                             .format(offset, len(self._numbers)))
+        self._index = offset
+
+    def tell(self):
+        """Return the index of the next number to read."""
+        return self._index
+
+
+def record_trace(path, generator, count, dtype=TRACE_DTYPE):
+    """
+    Record numbers from a generator as a trace file.
+
+    Arguments
+    ---------
+    path : str
+        The trace file, overwritten if it exists
+    generator : object
+        Generator with a ``random_block`` or a ``rand`` method
+    count : int
+        The number of numbers to record
+    dtype : str or np.dtype
+        The type of the integers in the file
+    """
+    dtype = np.dtype(dtype)
+    with open(path, 'wb') as trace:
+        for first in range(0, count, RECORD_CHUNK):
+            n = min(RECORD_CHUNK, count - first)
+            if hasattr(generator, 'random_block'):
+                block = generator.random_block(n)
+            else:
+                block = [generator.rand() for _ in range(n)]
+            trace.write(np.asarray(block, dtype=dtype).tobytes())
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+"""
+NumPy engine walking a whole population of walkers at once.
+
+Steps are drawn as packed random bits, 64 steps per ``uint64``, and turned
+into paths with a cumulative sum. A walker between reflecting limits follows
+the free path folded back into the limits: from a limit both free steps fold
+onto the step away from it, which is the rule of ``BoundedWalker``.
+"""
+
+import random
+
+import numpy as np
+
+from censoring import CensoredSteps
+
+# Walkers are walked in batches of at most this many walkers, and each round
+# draws about this many steps for the whole batch.
+BATCH_SIZE = 2 ** 14
+ROUND_STEPS = 2 ** 20
+
+# A single walk draws its first block of this many steps, doubling the block
+# size for every further block up to ``ROUND_STEPS``.
+BLOCK_SIZE = 2 ** 12
+
+
+def fold(paths, left_limit, right_limit):
+    """
+    Fold free paths back into reflecting limits.
+
+    Arguments
+    ---------
+    paths : np.ndarray
+        Positions of free walkers
+    left_limit : int or None
+        The left boundary, None if the walk is unbounded to the left
+    right_limit : int or None
+        The right boundary, None if the walk is unbounded to the right
+
+    Returns
+    -------
+    np.ndarray
+        Positions of the reflected walkers
+    """
+    if left_limit is not None and right_limit is not None:
+        width = right_limit - left_limit
+        if width == 0:
+            return np.full_like(paths, left_limit)
+        offset = (paths - left_limit) % (2 * width)
+        return left_limit + np.minimum(offset, 2 * width - offset)
+    if left_limit is not None:
+        return left_limit + np.abs(paths - left_limit)
+    if right_limit is not None:
+        return right_limit - np.abs(right_limit - paths)
+    return paths
+
+
+def _home_test(home, left_limit, right_limit):
+    """
+    Build a function telling which points of free paths fold onto home.
+
+    Between two limits the fold is periodic, so paths are taken relative to
+    the left limit, their start is reduced modulo the period, and home is
+    looked up in a table covering every point a path can reach in a round.
+
+    Returns
+    -------
+    callable
+        ``test(paths)`` returns a boolean array of the points at home
+    callable
+        ``reduce(positions)`` returns equivalent free positions
+    int
+        The origin the free positions are measured from
+    """
+    if left_limit is not None and right_limit is not None:
+        period = 2 * (right_limit - left_limit)
+        points = np.arange(-ROUND_STEPS, period + ROUND_STEPS) + left_limit
+        table = fold(points, left_limit, right_limit) == home
+
+        def test(paths):
+            return table[paths + ROUND_STEPS]
+
+        def reduce(positions):
+            return positions % period
+        return test, reduce, left_limit
+
+    homes = [home]
+    if left_limit is not None:
+        homes.append(2 * left_limit - home)
+    if right_limit is not None:
+        homes.append(2 * right_limit - home)
+
+    def test(paths):
+        hits = paths == homes[0]
+        for mirrored in homes[1:]:
+            hits |= paths == mirrored
+        return hits
+
+    def reduce(positions):
+        return positions
+    return test, reduce, 0
+
+
+def _walk_batch(start, home, num_walks, rng, left_limit, right_limit,
+                max_steps):
+    test, reduce, origin = _home_test(home, left_limit, right_limit)
+    result = np.empty(num_walks, dtype=np.int64)
+    drawn = np.zeros(num_walks, dtype=np.int64)
+    walkers = np.arange(num_walks)
+    positions = np.full(num_walks, start - origin, dtype=np.int64)
+    taken = 0
+    while walkers.size > 0:
+        words_per_walker = max(1, ROUND_STEPS // (64 * walkers.size))
+        if max_steps is not None:
+            words_per_walker = min(words_per_walker,
+                                   -(-(max_steps - taken) // 64))
+        words = rng.bit_generator.random_raw(walkers.size * words_per_walker)
+        drawn[walkers] += words_per_walker
+        bits = np.unpackbits(words.view(np.uint8)).reshape(walkers.size, -1)
+        paths = positions[:, None] + np.cumsum(
+            2 * bits.view(np.int8) - 1, axis=1, dtype=np.int64)
+        hits = test(paths)
+        home_now = hits.any(axis=1)
+        if max_steps is None:
+            done = home_now
+            result[walkers[home_now]] = (taken
+                                         + hits[home_now].argmax(axis=1) + 1)
+        else:
+            first = taken + hits.argmax(axis=1) + 1
+            home_now &= first <= max_steps
+            done = home_now | (taken + bits.shape[1] >= max_steps)
+            result[walkers[done]] = np.where(home_now[done], first[done], -1)
+        walking = ~done
+        walkers = walkers[walking]
+        positions = reduce(paths[walking, -1])
+        taken += bits.shape[1]
+    return result, drawn
+
+
+def _check_limits(start, home, left_limit, right_limit):
+    for position in (start, home):
+        if ((left_limit is not None and position < left_limit)
+                or (right_limit is not None and position > right_limit)):
+            raise ValueError('Position {0} is outside the limits {1} and {2}'
+                             .format(position, left_limit, right_limit))
+
+
+def block_walk(start, home, left_limit=None, right_limit=None,
+               max_steps=None, rng=None, return_draws=False):
+    """
+    Walk a single walker from start to home in blocks of steps.
+
+    Each block of steps is drawn with one ``random.getrandbits`` call and
+    turned into a path with a cumulative sum, folded into the limits if there
+    are any. The walk ends at the first point of the path at home, so it
+    takes as many steps as a step by step walk with the same steps.
+
+    Arguments
+    ---------
+    start : int
+        The walker's initial position
+    home : int
+        The walk ends when the walker reaches home
+    left_limit : int or None
+        Reflecting left boundary, None for no boundary
+    right_limit : int or None
+        Reflecting right boundary, None for no boundary
+    max_steps : int
+        If given, the walk is stopped after this many steps
+    rng : object
+        If given, a random number provider whose ``integers`` method draws
+        the steps instead of ``random.getrandbits``
+    return_draws : bool
+        If True, the number of random bits drawn, one per step of every
+        block, is returned as well
+
+    Returns
+    -------
+    int
+        The number of steps taken, ``CensoredSteps`` if the walk was stopped
+    int
+        The number of random bits drawn, only if ``return_draws`` is True
+
+    Raises
+    ------
+    ValueError
+        If start or home lies outside the limits
+    """
+    _check_limits(start, home, left_limit, right_limit)
+    steps, draws = _block_walk(start, home, left_limit, right_limit,
+                               max_steps, rng)
+    return (steps, draws) if return_draws else steps
+
+
+def _block_walk(start, home, left_limit, right_limit, max_steps, rng):
+    if start == home:
+        return 0, 0
+    position, taken, block_size = start, 0, BLOCK_SIZE
+    while True:
+        if rng is None:
+            block = random.getrandbits(block_size).to_bytes(block_size // 8,
+                                                            'little')
+            bits = np.unpackbits(np.frombuffer(block, dtype=np.uint8))
+        else:
+            bits = rng.integers(0, 1, block_size).astype(np.uint8)
+        path = position + np.cumsum(2 * bits.view(np.int8) - 1,
+                                    dtype=np.int64)
+        hits = fold(path, left_limit, right_limit) == home
+        if max_steps is not None:
+            hits = hits[:max_steps - taken]
+        if hits.any():
+            return taken + int(hits.argmax()) + 1, taken + block_size
+        if max_steps is not None and taken + block_size >= max_steps:
+            return CensoredSteps(max_steps), taken + block_size
+        position = int(path[-1])
+        taken += block_size
+        block_size = min(2 * block_size, ROUND_STEPS)
+
+
+def population_walks(start, home, num_walks, seed, left_limit=None,
+                     right_limit=None, max_steps=None, return_draws=False):
+    """
+    Walk a population of independent walkers from start to home.
+
+    Arguments
+    ---------
+    start : int
+        The walkers' initial position
+    home : int
+        The walk ends when a walker reaches home
+    num_walks : int
+        The number of walkers
+    seed : int
+        Seed for ``np.random.default_rng``
+    left_limit : int or None
+        Reflecting left boundary, None for no boundary
+    right_limit : int or None
+        Reflecting right boundary, None for no boundary
+    max_steps : int
+        If given, walkers are stopped after this many steps
+    return_draws : bool
+        If True, the number of 64 bit words drawn for each walker is
+        returned as well. Every round draws the same number of words for
+        each walker still walking, one per 64 steps.
+
+    Returns
+    -------
+    np.ndarray
+        The number of steps taken by each walker, -1 for walkers stopped
+        before reaching home
+    np.ndarray
+        The number of words drawn for each walker, only if ``return_draws``
+        is True
+
+    Raises
+    ------
+    ValueError
+        If start or home lies outside the limits
+    """
+    _check_limits(start, home, left_limit, right_limit)
+    steps = np.zeros(num_walks, dtype=np.int64)
+    draws = np.zeros(num_walks, dtype=np.int64)
+    if start != home:
+        rng = np.random.default_rng(seed)
+        for first in range(0, num_walks, BATCH_SIZE):
+            last = min(first + BATCH_SIZE, num_walks)
+            steps[first:last], draws[first:last] = _walk_batch(
+                start, home, last - first, rng, left_limit, right_limit,
+                max_steps)
+    return (steps, draws) if return_draws else steps
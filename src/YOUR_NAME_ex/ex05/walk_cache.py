@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+"""
+Cache of deterministic walk simulation results.
+
+A seeded simulation always gives the same walks, so its results can be
+stored under a key built from the simulation parameters. Keys include
+``ENGINE_VERSION``, which must be increased whenever a change to the walk
+engines changes the walks they produce.
+"""
+
+import collections
+import hashlib
+import json
+import os
+
+from censoring import CensoredSteps, is_censored
+
+ENGINE_VERSION = 1
+
+
+def _encode(value):
+    """Store censored walks as ``{"censored": steps}`` in JSON."""
+    return [{'censored': int(steps)} if is_censored(steps) else steps
+            for steps in value]
+
+
+def _decode(value):
+    return [CensoredSteps(steps['censored']) if isinstance(steps, dict)
+            else steps for steps in value]
+
+
+class WalkCache:
+    """
+    Least recently used in-memory cache with an optional on-disk store.
+    """
+
+    def __init__(self, maxsize=128, directory=None):
+        """
+        Initialise the cache
+
+        Arguments
+        ---------
+        maxsize : int
+            The number of results kept in memory
+        directory : str
+            If given, results are also stored as JSON files in this
+            directory and read back when they are not in memory
+        """
+        self.maxsize = maxsize
+        self.directory = directory
+        self._memory = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest + '.json')
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Look up a result.
+
+        Arguments
+        ---------
+        key : str
+            The key the result was stored under
+
+        Returns
+        -------
+        list[int] or None
+            A copy of the result, None if it is not cached
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return list(self._memory[key])
+        if self.directory is not None:
+            try:
+                with open(self._path(key)) as cache_file:
+                    stored = json.load(cache_file)
+            except FileNotFoundError:
+                return None
+            if stored['key'] == key:
+                value = _decode(stored['value'])
+                self._remember(key, value)
+                return list(value)
+        return None
+
+    def put(self, key, value):
+        """
+        Store a result.
+
+        Arguments
+        ---------
+        key : str
+            The key to store the result under
+        value : list[int]
+            The result
+        """
+        value = list(value)
+        self._remember(key, value)
+        if self.directory is not None:
+            path = self._path(key)
+            with open(path + '.tmp', 'w') as cache_file:
+                json.dump({'key': key, 'value': _encode(value)}, cache_file)
+            os.replace(path + '.tmp', path)
+
+    def get_or_compute(self, key, compute):
+        """
+        Look up a result, computing and storing it if it is not cached.
+
+        Arguments
+        ---------
+        key : str
+            The key of the result
+        compute : callable
+            Function taking no arguments which computes the result
+
+        Returns
+        -------
+        list[int]
+            A copy of the result
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return list(value)
+
+    def clear(self):
+        """Forget all results kept in memory."""
+        self._memory.clear()
+
+
+def cache_key(*parameters):
+    """
+    Build a cache key from simulation parameters and ``ENGINE_VERSION``.
+
+    Returns
+    -------
+    str
+    """
+    return repr(parameters + (ENGINE_VERSION,))
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+"""
+Array-backed population of one dimensional walkers.
+
+A ``WalkerPopulation`` holds the position and step count of every walker in
+typed NumPy arrays and offers the ``Walker`` methods vectorised over the
+whole population.
+"""
+
+import numpy as np
+
+
+class WalkerPopulation:
+    """
+    Population of walkers, each moving from its start towards its home.
+    """
+
+    __slots__ = ('_positions', '_steps', '_homes', '_rng')
+
+    def __init__(self, start, home, size=None, seed=None):
+        """
+        Initialise the population
+
+        Arguments
+        ---------
+        start : int or array_like
+            The walkers' initial positions
+        home : int or array_like
+            The walkers' homes
+        size : int
+            The number of walkers, needed if both start and home are
+            integers
+        seed : int
+            Seed for the ``np.random.default_rng`` moving the walkers
+        """
+        if size is None:
+            size = np.broadcast(np.asarray(start), np.asarray(home)).size
+        self._positions = np.empty(size, dtype=np.int32)
+        self._positions[:] = start
+        self._homes = np.asarray(home, dtype=np.int32)
+        self._steps = np.zeros(size, dtype=np.int64)
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return len(self._positions)
+
+    @property
+    def nbytes(self):
+        """Bytes used by the arrays describing the walkers."""
+        return (self._positions.nbytes + self._steps.nbytes
+                + self._homes.nbytes)
+
+    def get_position(self):
+        """Returns current position of every walker."""
+        return self._positions.copy()
+
+    def get_steps(self):
+        """Returns number of steps taken by every walker."""
+        return self._steps.copy()
+
+    def is_at_home(self):
+        """Returns a boolean array, True for walkers at their home."""
+        return self._positions == self._homes
+
+    def move(self):
+        """
+        Move every walker which is not at home by +1 or -1 with equal
+        probability.
+        """
+        walking = ~self.is_at_home()
+        directions = self._rng.integers(0, 2, size=int(walking.sum()),
+                                        dtype=np.int32)
+        self._positions[walking] += 2 * directions - 1
+        self._steps[walking] += 1
+
+    def walk_home(self):
+        """
+        Move the walkers until all of them are at home.
+
+        Returns
+        -------
+        np.ndarray
+            The number of steps taken by every walker
+        """
+        while not self.is_at_home().all():
+            self.move()
+        return self.get_steps()
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
+import math
 import random
 
+from censoring import CensoredSteps
+
 __author__ = 'Kevin Martin Lankut'
 __email__ = 'kela@nmbu.no'
 
@@ -10,14 +13,20 @@ class Walker:
     class simulating movement of a person in a one dimensional world from start to home
     """
 
-    def __init__(self, start, home):
+    __slots__ = ('start', 'home', 'steps', 'draws', 'rng')
+
+    def __init__(self, start, home, rng=None):
         """
         :param start: initial position of the walker
         :param home: position of the walker's home
+        :param rng: random number provider with a ``randint`` method, the
+            ``random`` module if not given
         """
         self.start = start
         self.home = home
         self.steps = 0
+        self.draws = 0
+        self.rng = random if rng is None else rng
 
     def get_position(self):
         """Returns current position."""
@@ -37,7 +46,8 @@ class Walker:
         """
         Change coordinate by +1 or -1 with equal probability.
         """
-        direction = random.randint(0, 1)
+        direction = self.rng.randint(0, 1)
+        self.draws += 1
         if direction == 0:
             self.start -= 1
         elif direction == 1:
@@ -45,12 +55,80 @@ class Walker:
         self.steps += 1
 
 
+ENGINES = ('walk', 'block', 'first_passage', 'numpy')
+
+# Below this many double steps the first passage survival function is
+# computed by its product formula, above it by an asymptotic series.
+_SERIES_THRESHOLD = 64
+
+
+def _survival(k):
+    """
+    Probability that a walker has not moved one step to the right after
+    ``2 * k`` steps, which is ``binomial(2 * k, k) / 4 ** k``.
+    """
+    return math.exp(-0.5 * math.log(k) + math.log1p(
+        -1 / (8 * k) + 1 / (128 * k ** 2) + 5 / (1024 * k ** 3)
+        - 21 / (32768 * k ** 4))) / math.sqrt(math.pi)
+
+
+def _first_passage_one():
+    """
+    Draw the number of steps a walker needs to first move one step to the
+    right, by inverting its survival function.
+
+    The walker needs ``2 * k + 1`` steps, where ``k`` is the largest integer
+    with ``binomial(2 * k, k) / 4 ** k >= u`` for a uniform ``u``.
+    """
+    u = 1 - random.random()
+    survival = 1.0
+    for k in range(_SERIES_THRESHOLD):
+        survival *= (2 * k + 1) / (2 * k + 2)
+        if survival < u:
+            return 2 * k + 1
+
+    # By Wallis' inequalities the survival function lies between
+    # 1 / sqrt(pi * (k + 1/2)) and 1 / sqrt(pi * (k + 1/4)), which leaves
+    # two candidates for k.
+    x = 1 / (math.pi * u ** 2)
+    k = math.floor(x - 0.25)
+    if k < 2 ** 53 and _survival(k) < u:
+        k -= 1
+    return 2 * k + 1
+
+
+def first_passage_steps(distance):
+    """
+    Draw the number of steps an unbounded walker needs to first reach a
+    point ``distance`` steps away.
+
+    The first passage time to a point ``distance`` steps away is the sum of
+    ``distance`` independent first passage times to the neighbouring point.
+
+    Arguments
+    ---------
+    distance : int
+        The distance between the walker and home
+
+    Returns
+    -------
+    int
+        The number of steps taken
+    """
+    steps = 0
+    for _ in range(abs(distance)):
+        steps += _first_passage_one()
+    return steps
+
+
 class Simulation:
     """
     class simulating the whole journey from start to home
     """
 
-    def __init__(self, start, home, seed):
+    def __init__(self, start, home, seed, engine='walk',
+                 independent_streams=False, cache=None, instrumentation=None,
+                 max_steps=None, rng=None):
         """
         Initialise the simulation
 
@@ -62,10 +140,123 @@ class Simulation:
             The walk ends when the walker reaches home
         seed : int
             Random generator seed
+        engine : str
+            ``'walk'`` moves the walker one step at a time, ``'block'``
+            walks it in blocks of steps using NumPy,
+            ``'first_passage'`` draws the number of steps directly from the
+            first passage time distribution of the unbounded walk,
+            ``'numpy'`` walks all walkers of a simulation at once with
+            independent NumPy random streams
+        independent_streams : bool
+            If True, the random generator is seeded once per simulation
+            instead of once per walk, so the walks differ from each other
+        cache : WalkCache
+            If given, simulation results are looked up in and stored in
+            this cache
+        instrumentation : Instrumentation
+            If given, runs of the simulation are recorded by it
+        max_steps : int
+            If given, walks are stopped after this many steps and reported
+            as ``CensoredSteps``
+        rng : object
+            If given, the walks draw from this random number generator,
+            wrapped by ``rng_providers.as_provider``, instead of the
+            ``random`` module. It is not seeded by the simulation, and
+            results are not cached. The numpy engine needs a NumPy
+            ``Generator`` and the first_passage engine cannot use one.
         """
+        if engine not in ENGINES:
+            raise ValueError('Unknown engine {0!r}, expected one of {1}'
+                             .format(engine, ENGINES))
+        if max_steps is not None and max_steps < 1:
+            raise ValueError('max_steps must be positive')
+        if rng is not None:
+            from rng_providers import NumpyProvider, as_provider
+            rng = as_provider(rng)
+            if (engine == 'first_passage' or engine == 'numpy'
+                    and not isinstance(rng, NumpyProvider)):
+                raise ValueError('The {0} engine cannot draw from {1!r}'
+                                 .format(engine, rng))
         self.start = start
         self.home = home
         self.seed = seed
+        self.engine = engine
+        self.independent_streams = independent_streams
+        self.cache = cache
+        self.instrumentation = instrumentation
+        self.max_steps = max_steps
+        self.rng = rng
+
+    def _seed(self):
+        """Seed the ``random`` module, unless walks use another rng."""
+        if self.rng is None:
+            random.seed(self.seed)
+
+    def _numpy_seed(self):
+        """Seed or generator for the numpy engine."""
+        return self.seed if self.rng is None else self.rng.generator
+
+    def _walk(self):
+        """
+        Walk from start to home using the current random state, returning
+        the number of steps and the number of random draws made.
+        """
+        if self.engine == 'first_passage':
+            distance = abs(self.home - self.start)
+            steps = first_passage_steps(distance)
+            if self.max_steps is not None and steps > self.max_steps:
+                return CensoredSteps(self.max_steps), distance
+            return steps, distance
+        if self.engine == 'block':
+            from vectorized_walks import block_walk
+            return block_walk(self.start, self.home, max_steps=self.max_steps,
+                              rng=self.rng, return_draws=True)
+        w = Walker(self.start, self.home, self.rng)
+        position = w.get_position()
+        max_steps = self.max_steps
+        while position != self.home:
+            if max_steps is not None and w.steps == max_steps:
+                return CensoredSteps(max_steps), w.draws
+            w.move()
+            position = w.get_position()
+        return w.get_steps(), w.draws
+
+    def _cached(self, method, num_walks, run):
+        """Return ``run()``, going through the cache if there is one."""
+        if self.cache is None or self.rng is not None:
+            return run()
+        from walk_cache import cache_key
+        key = cache_key(type(self).__name__, method,
+                        *self._cache_parameters(), self.engine,
+                        self.independent_streams, self.max_steps, num_walks)
+        return self.cache.get_or_compute(key, run)
+
+    def _instrumented(self, run):
+        """Return ``run()``, recording it if there is an instrumentation."""
+        if self.instrumentation is None:
+            return run()
+        self.instrumentation.start_run()
+        walks = run()
+        self.instrumentation.end_run(walks)
+        return walks
+
+    def _record(self, steps, draws):
+        """
+        Record a finished walk if there is an instrumentation.
+
+        Draws are counted as the engines draw: one ``randint`` per step
+        for the walk engine, one uniform number per unit of distance for
+        the first_passage engine, one random bit per step of each block for
+        the block engine, and one 64 bit word per 64 steps of each round
+        for the numpy engine.
+        """
+        if self.instrumentation is not None:
+            self.instrumentation.record_walk(steps, draws)
+        return steps
+
+    def _cache_parameters(self):
+        """Parameters which, with the engine, determine the walks."""
+        return self.start, self.home, self.seed
 
     def single_walk(self):
         """
@@ -76,13 +267,13 @@ class Simulation:
         int
             The number of steps taken
         """
-        random.seed(self.seed)
-        w = Walker(self.start, self.home)
-        position = w.get_position()
-        while position != self.home:
-            w.move()
-            position = w.get_position()
-        return w.get_steps()
+        if self.engine == 'numpy':
+            return self.run_simulation(1)[0]
+        return self._single_walk()[0]
+
+    def _single_walk(self):
+        self._seed()
+        return self._walk()
 
     def run_simulation(self, num_walks):
         """
@@ -96,12 +287,30 @@ class Simulation:
         Returns
         -------
         list[int]
-            List with the number of steps per walk
+            List with the number of steps per walk, ``CensoredSteps`` for
+            walks stopped at ``max_steps``
         """
+        return self._instrumented(lambda: self._cached(
+            'run_simulation', num_walks,
+            lambda: self._run_simulation(num_walks)))
+
+    def _run_simulation(self, num_walks):
+        if self.engine == 'numpy':
+            from vectorized_walks import population_walks
+            steps, draws = population_walks(self.start, self.home, num_walks,
+                                            self._numpy_seed(),
+                                            max_steps=self.max_steps,
+                                            return_draws=True)
+            return [self._record(CensoredSteps(self.max_steps) if walk < 0
+                                 else walk, drawn)
+                    for walk, drawn in zip(steps.tolist(), draws.tolist())]
+        if self.independent_streams:
+            self._seed()
+            return [self._record(*self._walk()) for _ in range(num_walks)]
         total_steps = []
         for _ in range(0, num_walks):
-            simulation = self.single_walk()
-            total_steps.append(simulation)
+            simulation = self._single_walk()
+            total_steps.append(self._record(*simulation))
         return total_steps
 
 
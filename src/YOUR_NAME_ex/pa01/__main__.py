@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+__authors__ = 'Kaspar Akilles Lilja, Kevin Martin Lankut'
+__emails__ = 'kalilja@nmbu.no, kela@nmbu.no'
+
+"""
+Command line interface for snakes and ladders experiments.
+
+Run ``python pa01 --help`` or ``python -m pa01 --help`` for the options.
+The simulation modules are only imported after the arguments are parsed, so
+``--help`` and small runs start quickly.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+FORMATS = ('text', 'json', 'csv', 'histogram')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='pa01', description='Play games of snakes and ladders.')
+    parser.add_argument('-n', '--games', type=int, default=100,
+                        help='number of games to play (default: 100)')
+    parser.add_argument('-p', '--players', type=int, default=4,
+                        help='number of players per game (default: 4)')
+    parser.add_argument('-s', '--seed', type=int, default=89,
+                        help='random generator seed (default: 89)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='play shards of games on this many processes')
+    parser.add_argument('-e', '--engine', choices=('python', 'numpy'),
+                        default='python', help='simulation engine')
+    parser.add_argument('-f', '--format', choices=FORMATS, default='text',
+                        help='output format: summary text, JSON summary, CSV '
+                             'of game lengths or histogram of game lengths')
+    parser.add_argument('-o', '--output', default=None,
+                        help='file to write to (default: standard output)')
+    parser.add_argument('--checkpoint', default=None, metavar='PATH',
+                        help='write checkpoints to PATH while playing')
+    parser.add_argument('--checkpoint-every', type=int, default=None,
+                        metavar='GAMES', help='games between checkpoints')
+    parser.add_argument('--resume', default=None, metavar='PATH',
+                        help='resume the experiment checkpointed in PATH')
+    args = parser.parse_args(argv)
+
+    if args.games < 0 or args.players < 1:
+        parser.error('need at least 0 games and 1 player')
+    if args.workers is not None and args.workers < 1:
+        parser.error('need at least 1 worker')
+    checkpointed = args.checkpoint is not None or args.resume is not None
+    if checkpointed and args.format == 'csv':
+        parser.error('checkpointed runs only keep summary statistics')
+    if checkpointed and args.workers is not None:
+        parser.error('checkpointed runs cannot use workers')
+    return args
+
+
+def run(args):
+    """Run the experiment described by ``args``, returning the result."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    if args.resume is not None:
+        import checkpoint
+        return checkpoint.resume(args.resume)
+    if args.checkpoint is not None:
+        import checkpoint
+        every = args.checkpoint_every or checkpoint.CHECKPOINT_EVERY
+        return checkpoint.run_checkpointed(
+            args.checkpoint, args.games, args.players, args.seed,
+            engine=args.engine, checkpoint_every=every)
+
+    import snakes_and_ladders
+    return snakes_and_ladders.multi_game_experiment(
+        args.games, args.players, args.seed, engine=args.engine,
+        workers=args.workers, summarize=args.format != 'csv')
+
+
+def write_result(result, args, output):
+    if args.format == 'csv':
+        output.write('game,moves\n')
+        for game, moves in enumerate(result, 1):
+            output.write('{0},{1}\n'.format(game, moves))
+    elif args.format == 'histogram':
+        output.write('moves,games\n')
+        for moves, games in enumerate(result.histogram):
+            if games:
+                output.write('{0},{1}\n'.format(moves, games))
+    elif result.count == 0:
+        raise SystemExit('pa01: no games played')
+    elif args.format == 'json':
+        summary = {'games': result.count, 'min': result.min, 'max': result.max,
+                   'mean': result.mean, 'median': result.median,
+                   'stdev': result.stdev if result.count > 1 else None}
+        if args.resume is None:
+            summary.update(players=args.players, seed=args.seed,
+                           engine=args.engine)
+        json.dump(summary, output, indent=2)
+        output.write('\n')
+    else:
+        output.write('The shortest game duration was {0}, and the longest '
+                     'was {1}\n'.format(result.min, result.max))
+        output.write('The median is {0}\n'.format(result.median))
+        if result.count > 1:
+            output.write('The mean is {0} and the standard deviation is '
+                         '{1:.2}\n'.format(result.mean, result.stdev))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = run(args)
+    if args.output is None:
+        write_result(result, args, sys.stdout)
+    else:
+        with open(args.output, 'w') as output:
+            write_result(result, args, output)
+
+
+if __name__ == "__main__":
+    main()
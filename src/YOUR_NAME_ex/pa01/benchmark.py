@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+__authors__ = 'Kaspar Akilles Lilja, Kevin Martin Lankut'
+__emails__ = 'kalilja@nmbu.no, kela@nmbu.no'
+
+"""
+Benchmarks for the snakes and ladders simulation.
+
+Run ``python benchmark.py`` to time ``move_player``, ``single_game`` and
+``multi_game_experiment`` for every engine and write the results to a JSON
+file. Run ``python benchmark.py --compare OLD NEW`` to compare two result
+files, for instance from two commits.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import snakes_and_ladders as sl
+
+PLAYER_COUNTS = range(1, 9)
+GAME_COUNTS = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+MOVE_CALLS = 10 ** 5
+SINGLE_GAMES = 10 ** 3
+
+
+def best_time(func, repeat):
+    """
+    Time ``func`` a number of times.
+
+    Arguments
+    ---------
+    func : callable
+        Function taking no arguments
+    repeat : int
+        The number of times to call ``func``
+
+    Returns
+    -------
+    float
+        The fastest wall time in seconds
+    result
+        The value returned by the fastest call
+    """
+    best, best_result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best, best_result = elapsed, result
+    return best, best_result
+
+
+def bench_move_player(repeat):
+    """Time ``MOVE_CALLS`` calls of ``move_player``."""
+    def moves():
+        position = 0
+        for _ in range(MOVE_CALLS):
+            position = sl.move_player(1, position % sl.GOAL)
+    seconds, _ = best_time(moves, repeat)
+    return {'benchmark': 'move_player', 'engine': 'python',
+            'num_players': 1, 'num_games': 0, 'seconds': seconds,
+            'games_per_sec': None, 'moves_per_sec': MOVE_CALLS / seconds}
+
+
+def bench_single_game(num_players, repeat):
+    """Time ``SINGLE_GAMES`` calls of ``single_game``."""
+    def games():
+        return sum(sl.single_game(num_players) for _ in range(SINGLE_GAMES))
+    seconds, moves = best_time(games, repeat)
+    return {'benchmark': 'single_game', 'engine': 'python',
+            'num_players': num_players, 'num_games': SINGLE_GAMES,
+            'seconds': seconds, 'games_per_sec': SINGLE_GAMES / seconds,
+            'moves_per_sec': moves / seconds}
+
+
+def bench_experiment(engine, num_games, num_players, repeat):
+    """Time one call of ``multi_game_experiment``."""
+    def experiment():
+        return sl.multi_game_experiment(num_games, num_players, 1,
+                                        engine=engine, summarize=True)
+    seconds, stats = best_time(experiment, repeat)
+    return {'benchmark': 'multi_game_experiment', 'engine': engine,
+            'num_players': num_players, 'num_games': num_games,
+            'seconds': seconds, 'games_per_sec': num_games / seconds,
+            'moves_per_sec': stats.mean * stats.count / seconds}
+
+
+def git_commit():
+    """Return the current git commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(engines=sl.ENGINES, player_counts=PLAYER_COUNTS,
+                   game_counts=GAME_COUNTS, repeat=3, max_python_games=None,
+                   report=print):
+    """
+    Run the benchmark suite.
+
+    Arguments
+    ---------
+    engines : iterable of str
+        The engines to benchmark ``multi_game_experiment`` with
+    player_counts : iterable of int
+        The numbers of players to benchmark
+    game_counts : iterable of int
+        The numbers of games to benchmark
+    repeat : int
+        Each benchmark reports the fastest of ``repeat`` runs
+    max_python_games : int
+        If given, larger game counts are skipped for the python engine
+    report : callable
+        Called with a line of text after each benchmark
+
+    Returns
+    -------
+    dict
+        Machine information and a list of benchmark results
+    """
+    results = [bench_move_player(repeat)]
+    report('{benchmark}: {moves_per_sec:.0f} moves/s'.format(**results[0]))
+    for num_players in player_counts:
+        result = bench_single_game(num_players, repeat)
+        results.append(result)
+        report('{benchmark} players={num_players}: {games_per_sec:.0f} '
+               'games/s, {moves_per_sec:.0f} moves/s'.format(**result))
+
+    for engine in engines:
+        for num_games in game_counts:
+            if (engine == 'python' and max_python_games is not None
+                    and num_games > max_python_games):
+                continue
+            for num_players in player_counts:
+                result = bench_experiment(engine, num_games, num_players,
+                                          repeat)
+                results.append(result)
+                report('{benchmark} {engine} games={num_games} '
+                       'players={num_players}: {games_per_sec:.0f} games/s, '
+                       '{moves_per_sec:.0f} moves/s'.format(**result))
+
+    return {'commit': git_commit(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0], 'machine': platform.platform(),
+            'results': results}
+
+
+def compare(old, new):
+    """
+    Compare two sets of benchmark results.
+
+    Arguments
+    ---------
+    old, new : dict
+        Results from ``run_benchmarks``
+
+    Returns
+    -------
+    list[tuple]
+        ``(benchmark, engine, num_players, num_games, speedup)`` for every
+        benchmark present in both, where the speedup is the old time divided
+        by the new time
+    """
+    def key(result):
+        return (result['benchmark'], result['engine'], result['num_players'],
+                result['num_games'])
+
+    old_seconds = {key(result): result['seconds'] for result in old['results']}
+    return [key(result) + (old_seconds[key(result)] / result['seconds'],)
+            for result in new['results'] if key(result) in old_seconds]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmarks for the snakes and ladders simulation.')
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help='file the results are written to')
+    parser.add_argument('--engines', nargs='+', default=list(sl.ENGINES),
+                        choices=sl.ENGINES)
+    parser.add_argument('--players', nargs='+', type=int,
+                        default=list(PLAYER_COUNTS))
+    parser.add_argument('--games', nargs='+', type=int,
+                        default=list(GAME_COUNTS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-python-games', type=int, default=None,
+                        help='skip larger game counts for the python engine')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two result files instead of running')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as old_file:
+            old = json.load(old_file)
+        with open(args.compare[1]) as new_file:
+            new = json.load(new_file)
+        for benchmark, engine, players, games, speedup in compare(old, new):
+            print('{0} {1} games={2} players={3}: {4:.2f}x'.format(
+                benchmark, engine, games, players, speedup))
+        return
+
+    results = run_benchmarks(args.engines, args.players, args.games,
+                             args.repeat, args.max_python_games)
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+__authors__ = 'Kaspar Akilles Lilja, Kevin Martin Lankut'
+__emails__ = 'kalilja@nmbu.no, kela@nmbu.no'
+
+"""
+Checkpointed game experiments that can be resumed after being killed.
+
+The games are played in intervals. After each interval the random generator
+state and the ``DurationStatistics`` of the games played so far are written
+to the checkpoint file, so ``resume`` continues exactly where the last
+checkpoint left off and ends with the same statistics as an uninterrupted
+run.
+"""
+
+import os
+import pickle
+import random
+
+from duration_stats import DurationStatistics
+from snakes_and_ladders import DEFAULT_BOARD, ENGINES, single_game
+
+CHECKPOINT_EVERY = 10 ** 6
+
+
+def save_checkpoint(path, state):
+    """
+    Atomically write a checkpoint.
+
+    The state is written to a temporary file which then replaces ``path``,
+    so a process killed while writing leaves the previous checkpoint intact.
+
+    Arguments
+    ---------
+    path : str
+        The checkpoint file
+    state : dict
+        The experiment state
+    """
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as checkpoint_file:
+        pickle.dump(state, checkpoint_file)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path):
+    """Read the experiment state from a checkpoint file."""
+    with open(path, 'rb') as checkpoint_file:
+        return pickle.load(checkpoint_file)
+
+
+def run_checkpointed(path, num_games, num_players, seed, engine='python',
+                     board=DEFAULT_BOARD, checkpoint_every=CHECKPOINT_EVERY):
+    """
+    Play a seeded set of games, writing a checkpoint at regular intervals.
+
+    The result is the same as from ``multi_game_experiment`` with
+    ``summarize=True``. For the numpy engine the interval is rounded up to
+    a whole number of lockstep chunks.
+
+    Arguments
+    ---------
+    path : str
+        The checkpoint file
+    num_games : int
+        The number of games to play
+    num_players : int
+        The number of players in each game
+    seed : int
+        Random generator seed
+    engine : str
+        ``'python'`` or ``'numpy'``
+    board : Board
+        The board to play on
+    checkpoint_every : int
+        The number of games played between checkpoints
+
+    Returns
+    -------
+    DurationStatistics
+        Summary of the number of moves in each game
+    """
+    if engine == 'python':
+        random.seed(seed)
+        rng_state = random.getstate()
+    elif engine == 'numpy':
+        import numpy as np
+        from lockstep_games import CHUNK_SIZE
+        rng_state = np.random.default_rng(seed).bit_generator.state
+        checkpoint_every = -(-checkpoint_every // CHUNK_SIZE) * CHUNK_SIZE
+    else:
+        raise ValueError('Unknown engine {0!r}, expected one of {1}'.format(
+            engine, ENGINES))
+
+    state = {'num_games': num_games, 'num_players': num_players,
+             'engine': engine, 'board': board,
+             'checkpoint_every': checkpoint_every, 'games_played': 0,
+             'rng_state': rng_state, 'stats': DurationStatistics()}
+    save_checkpoint(path, state)
+    return _continue(path, state)
+
+
+def resume(path):
+    """
+    Continue an experiment from its checkpoint file.
+
+    Arguments
+    ---------
+    path : str
+        The checkpoint file written by ``run_checkpointed``
+
+    Returns
+    -------
+    DurationStatistics
+        Summary of the number of moves in each game of the experiment
+    """
+    return _continue(path, load_checkpoint(path))
+
+
+def _continue(path, state):
+    if state['engine'] == 'python':
+        play_interval = _play_python
+    else:
+        play_interval = _play_numpy
+
+    while state['games_played'] < state['num_games']:
+        num_games = min(state['checkpoint_every'],
+                        state['num_games'] - state['games_played'])
+        state['rng_state'] = play_interval(num_games, state)
+        state['games_played'] += num_games
+        save_checkpoint(path, state)
+    return state['stats']
+
+
+def _play_python(num_games, state):
+    random.setstate(state['rng_state'])
+    for _ in range(num_games):
+        state['stats'].add(single_game(state['num_players'], state['board']))
+    return random.getstate()
+
+
+def _play_numpy(num_games, state):
+    import numpy as np
+    from lockstep_games import CHUNK_SIZE, lockstep_games
+
+    rng = np.random.default_rng()
+    rng.bit_generator.state = state['rng_state']
+    table = np.array(state['board'].destination, dtype=np.int16)
+    for first in range(0, num_games, CHUNK_SIZE):
+        state['stats'].update(lockstep_games(
+            min(CHUNK_SIZE, num_games - first), state['num_players'], rng,
+            table, state['board'].goal))
+    return rng.bit_generator.state
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+__authors__ = 'Kaspar Akilles Lilja, Kevin Martin Lankut'
+__emails__ = 'kalilja@nmbu.no, kela@nmbu.no'
+
+"""
+Constant-memory statistics of game durations.
+
+Game durations are small positive integers, so an exact histogram takes
+memory proportional to the longest game, not to the number of games. The
+mean and variance are kept with Welford's algorithm and combined across
+shards with the parallel formula of Chan et al.
+"""
+
+import math
+
+
+class DurationStatistics:
+    """
+    Streaming accumulator of game durations.
+    """
+
+    def __init__(self):
+        """Initialise an empty accumulator."""
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.histogram = []
+
+    def add(self, moves):
+        """
+        Add a single game duration.
+
+        Arguments
+        ---------
+        moves : int
+            The number of moves in the game
+        """
+        self.count += 1
+        delta = moves - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (moves - self.mean)
+        if self.min is None or moves < self.min:
+            self.min = moves
+        if self.max is None or moves > self.max:
+            self.max = moves
+        if moves >= len(self.histogram):
+            self.histogram.extend([0] * (moves + 1 - len(self.histogram)))
+        self.histogram[moves] += 1
+
+    def update(self, durations):
+        """
+        Add several game durations.
+
+        NumPy arrays are summarised in one vectorised pass, other iterables
+        are added one duration at a time.
+
+        Arguments
+        ---------
+        durations : iterable of int
+            The number of moves in each game
+        """
+        if hasattr(durations, 'dtype'):
+            self.merge(self.from_array(durations))
+        else:
+            for moves in durations:
+                self.add(moves)
+
+    @classmethod
+    def from_array(cls, durations):
+        """
+        Summarise a NumPy array of game durations.
+
+        Arguments
+        ---------
+        durations : np.ndarray
+            The number of moves in each game
+
+        Returns
+        -------
+        DurationStatistics
+        """
+        import numpy as np
+
+        stats = cls()
+        if len(durations) == 0:
+            return stats
+        stats.count = len(durations)
+        stats.min = int(durations.min())
+        stats.max = int(durations.max())
+        stats.mean = float(durations.mean())
+        stats._m2 = float(((durations - stats.mean) ** 2).sum())
+        stats.histogram = np.bincount(durations).tolist()
+        return stats
+
+    def merge(self, other):
+        """
+        Add the games summarised by another accumulator.
+
+        Arguments
+        ---------
+        other : DurationStatistics
+        """
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.min, self.max = other.min, other.max
+        else:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta ** 2 * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        if len(other.histogram) > len(self.histogram):
+            self.histogram.extend(
+                [0] * (len(other.histogram) - len(self.histogram)))
+        for moves, games in enumerate(other.histogram):
+            self.histogram[moves] += games
+
+    @property
+    def variance(self):
+        """Sample variance, as ``statistics.variance``."""
+        if self.count < 2:
+            raise ValueError('variance requires at least two games')
+        return self._m2 / (self.count - 1)
+
+    @property
+    def stdev(self):
+        """Sample standard deviation, as ``statistics.stdev``."""
+        return math.sqrt(self.variance)
+
+    def _order_statistic(self, rank):
+        """Return the ``rank``-th smallest duration, counting from 0."""
+        seen = 0
+        for moves, games in enumerate(self.histogram):
+            seen += games
+            if seen > rank:
+                return moves
+        raise IndexError('rank {0} out of range'.format(rank))
+
+    def quantile(self, q):
+        """
+        Return the smallest duration with at least a fraction ``q`` of the
+        games lasting at most that long.
+
+        Arguments
+        ---------
+        q : float
+            Quantile between 0 and 1
+
+        Returns
+        -------
+        int
+        """
+        if self.count == 0:
+            raise ValueError('quantile of no games')
+        if not 0 <= q <= 1:
+            raise ValueError('q must be between 0 and 1')
+        return self._order_statistic(max(math.ceil(q * self.count) - 1, 0))
+
+    @property
+    def median(self):
+        """Median duration, as ``statistics.median``."""
+        if self.count == 0:
+            raise ValueError('median of no games')
+        middle = self.count // 2
+        if self.count % 2 == 1:
+            return self._order_statistic(middle)
+        return (self._order_statistic(middle - 1)
+                + self._order_statistic(middle)) / 2
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+__authors__ = 'Kaspar Akilles Lilja, Kevin Martin Lankut'
+__emails__ = 'kalilja@nmbu.no, kela@nmbu.no'
+
+"""
+NumPy engine playing many games of snakes and ladders in lockstep.
+
+Every game in a batch is advanced one round at a time. The dice for a whole
+round are drawn as one block, snakes and ladders are applied through a
+lookup table, and games are dropped from the batch as soon as a player wins.
+"""
+
+import numpy as np
+
+from snakes_and_ladders import DEFAULT_BOARD
+
+CHUNK_SIZE = 2 ** 18
+
+
+def lockstep_games(num_games, num_players, rng, table, goal):
+    """
+    Play a batch of games in lockstep, returning the number of moves in each.
+
+    Moves are counted the same way as in ``single_game``: every player's turn
+    is one move, and a game ends as soon as one player passes the goal.
+
+    Arguments
+    ---------
+    num_games : int
+        The number of games to play
+    num_players : int
+        The number of players in each game
+    rng : np.random.Generator
+        Generator the dice are drawn from
+    table : np.ndarray
+        ``table[square]`` is the final position after landing on ``square``
+    goal : int
+        A player wins by reaching or passing this square
+
+    Returns
+    -------
+    np.ndarray
+        The number of moves in each game
+    """
+    moves = np.empty(num_games, dtype=np.int64)
+    positions = np.zeros((num_games, num_players), dtype=np.int16)
+    games = np.arange(num_games)
+    turn = 0
+    while games.size > 0:
+        throws = rng.integers(1, 7, size=positions.shape, dtype=np.int16)
+        running = np.ones(games.size, dtype=bool)
+        for player in range(num_players):
+            new_positions = table[positions[:, player] + throws[:, player]]
+            positions[:, player] = new_positions
+            won = running & (new_positions >= goal)
+            moves[games[won]] = turn * num_players + player + 1
+            running &= ~won
+        games = games[running]
+        positions = positions[running]
+        turn += 1
+    return moves
+
+
+def iter_games_lockstep(num_games, num_players, seed, board=DEFAULT_BOARD):
+    """
+    Play a seeded set of games in chunks of ``CHUNK_SIZE`` games.
+
+    Arguments
+    ---------
+    num_games : int
+        The number of games to play
+    num_players : int
+        The number of players in each game
+    seed : int
+        Seed for ``np.random.default_rng``
+    board : Board
+        The board to play on
+
+    Yields
+    ------
+    np.ndarray
+        The number of moves in each game of a chunk
+    """
+    rng = np.random.default_rng(seed)
+    table = np.array(board.destination, dtype=np.int16)
+    for first in range(0, num_games, CHUNK_SIZE):
+        last = min(first + CHUNK_SIZE, num_games)
+        yield lockstep_games(last - first, num_players, rng, table,
+                             board.goal)
+
+
+def multiple_games_lockstep(num_games, num_players, seed,
+                            board=DEFAULT_BOARD):
+    """
+    Play a seeded set of games, returning the number of moves in each.
+
+    Arguments
+    ---------
+    num_games : int
+        The number of games to play
+    num_players : int
+        The number of players in each game
+    seed : int
+        Seed for ``np.random.default_rng``
+    board : Board
+        The board to play on
+
+    Returns
+    -------
+    np.ndarray
+        The number of moves in each game
+    """
+    moves = np.empty(num_games, dtype=np.int64)
+    first = 0
+    for chunk in iter_games_lockstep(num_games, num_players, seed, board):
+        moves[first:first + len(chunk)] = chunk
+        first += len(chunk)
+    return moves
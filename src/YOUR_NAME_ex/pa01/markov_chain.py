@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+__authors__ = 'Kaspar Akilles Lilja, Kevin Martin Lankut'
+__emails__ = 'kalilja@nmbu.no, kela@nmbu.no'
+
+"""
+Exact game-length distribution for snakes and ladders.
+
+A single player moving on the board is an absorbing Markov chain with the
+squares ``0, ..., goal - 1`` as transient states and "passed the goal" as the
+absorbing state. The number of turns a player needs is the hitting time of
+the absorbing state. Players move independently, so the length of a game
+with several players follows from the single-player distribution.
+"""
+
+import numpy as np
+
+from snakes_and_ladders import DEFAULT_BOARD
+
+TOLERANCE = 1e-12
+MAX_TURNS = 10 ** 5
+
+
+def transition_matrix(board=DEFAULT_BOARD):
+    """
+    Build the transition matrix of a single player.
+
+    Arguments
+    ---------
+    board : Board
+        The board to play on
+
+    Returns
+    -------
+    np.ndarray
+        Matrix of shape ``(goal + 1, goal + 1)`` where entry ``[i, j]`` is
+        the probability of moving from square ``i`` to square ``j`` in one
+        turn. Index ``goal`` is the absorbing state.
+    """
+    goal = board.goal
+    matrix = np.zeros((goal + 1, goal + 1))
+    for square in range(goal):
+        for throw in range(1, 7):
+            next_pos = board.destination[square + throw]
+            matrix[square, min(next_pos, goal)] += 1 / 6
+    matrix[goal, goal] = 1
+    return matrix
+
+
+def single_player_pmf(matrix=None, tol=TOLERANCE, max_turns=MAX_TURNS):
+    """
+    Compute the distribution of the number of turns one player needs.
+
+    Arguments
+    ---------
+    matrix : np.ndarray
+        Transition matrix, ``transition_matrix()`` if not given
+    tol : float
+        The distribution is cut off once less than ``tol`` of the probability
+        mass is left
+    max_turns : int
+        The largest number of turns followed
+
+    Returns
+    -------
+    np.ndarray
+        ``pmf[t]`` is the probability that the player finishes on turn ``t``
+
+    Raises
+    ------
+    ValueError
+        If more than ``tol`` of the probability mass is left after
+        ``max_turns`` turns, as when the player can be trapped on squares
+        from which the goal cannot be reached
+    """
+    if matrix is None:
+        matrix = transition_matrix()
+    goal = len(matrix) - 1
+    transient = matrix[:goal, :goal]
+    finishing = matrix[:goal, goal]
+    state = np.zeros(goal)
+    state[0] = 1
+    pmf = [0.0]
+    remaining = 1.0
+    while remaining > tol:
+        if len(pmf) > max_turns:
+            raise ValueError('{0:.3g} of the probability mass is left after '
+                             '{1} turns'.format(remaining, max_turns))
+        pmf.append(state @ finishing)
+        state = state @ transient
+        remaining = state.sum()
+    return np.array(pmf)
+
+
+def single_player_cdf(matrix=None, tol=TOLERANCE):
+    """
+    Compute the cumulative distribution of the number of turns one player
+    needs, ``cdf[t]`` being the probability of finishing by turn ``t``.
+    """
+    return np.cumsum(single_player_pmf(matrix, tol))
+
+
+def game_duration_pmf(num_players, matrix=None, tol=TOLERANCE):
+    """
+    Compute the distribution of the number of moves in a game.
+
+    Moves are counted as in ``single_game``: player ``i`` (counting from 1)
+    finishing on turn ``t`` ends the game after ``(t - 1) * num_players + i``
+    moves, provided the players before them have not finished by turn ``t``
+    and the players after them have not finished by turn ``t - 1``.
+
+    Arguments
+    ---------
+    num_players : int
+        The number of players in the game
+    matrix : np.ndarray
+        Transition matrix, ``transition_matrix()`` if not given
+    tol : float
+        Cut-off for the single player distribution
+
+    Returns
+    -------
+    np.ndarray
+        ``pmf[m]`` is the probability that the game lasts ``m`` moves
+    """
+    turn_pmf = single_player_pmf(matrix, tol)
+    survival = 1 - np.cumsum(turn_pmf)
+    survival_before = np.concatenate(([1.0], survival[:-1]))
+    pmf = np.zeros(len(turn_pmf) * num_players + 1)
+    turns = np.arange(1, len(turn_pmf))
+    for player in range(1, num_players + 1):
+        moves = (turns - 1) * num_players + player
+        pmf[moves] = (turn_pmf[turns]
+                      * survival[turns] ** (player - 1)
+                      * survival_before[turns] ** (num_players - player))
+    return pmf
+
+
+def game_duration_summary(num_players, matrix=None, tol=TOLERANCE):
+    """
+    Compute summary statistics of the number of moves in a game.
+
+    Arguments
+    ---------
+    num_players : int
+        The number of players in the game
+    matrix : np.ndarray
+        Transition matrix, ``transition_matrix()`` if not given
+    tol : float
+        Cut-off for the single player distribution
+
+    Returns
+    -------
+    dict
+        The ``'mean'``, ``'median'`` and (population) ``'stdev'`` of the
+        game length
+    """
+    pmf = game_duration_pmf(num_players, matrix, tol)
+    moves = np.arange(len(pmf))
+    mean = pmf @ moves
+    variance = pmf @ (moves - mean) ** 2
+    median = int(np.searchsorted(np.cumsum(pmf), 0.5))
+    return {'mean': float(mean), 'median': median,
+            'stdev': float(np.sqrt(variance))}
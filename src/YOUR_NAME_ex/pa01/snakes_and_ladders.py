@@ -8,24 +8,136 @@ Source:
 https://codereview.stackexchange.com/questions/176586/snakes-and-ladders-game
 """
 
+import atexit
 import random
-import statistics
 
+from duration_stats import DurationStatistics
 
-def move_player(player, current_pos):
-    snake_squares = {24: 5, 33: 3, 42: 30, 56: 37, 64: 27, 74: 12, 87: 70}
-    ladder_squares = {1: 40, 8: 10, 36: 52, 43: 62, 49: 79, 65: 82, 68: 85}
+SNAKE_SQUARES = {24: 5, 33: 3, 42: 30, 56: 37, 64: 27, 74: 12, 87: 70}
+LADDER_SQUARES = {1: 40, 8: 10, 36: 52, 43: 62, 49: 79, 65: 82, 68: 85}
+GOAL = 90
 
-    throw = random.randint(1, 6)
-    next_pos = current_pos + throw
-    if next_pos in snake_squares:
-        next_pos = snake_squares[next_pos]
-    elif next_pos in ladder_squares:
-        next_pos = ladder_squares[next_pos]
-    return next_pos
+ENGINES = ('python', 'numpy')
+SHARD_SIZE = 2 ** 16
 
+_pools = {}
 
-def single_game(num_players):
+
+class Board:
+    """
+    Snakes and ladders board compiled into a destination table.
+    """
+
+    def __init__(self, snakes=None, ladders=None, goal=GOAL,
+                 resolve_chains=False):
+        """
+        Initialise the board
+
+        Arguments
+        ---------
+        snakes : dict
+            Maps the head of each snake to its tail, the snakes of the
+            default board if not given
+        ladders : dict
+            Maps the foot of each ladder to its top, the ladders of the
+            default board if not given
+        goal : int
+            A player wins by reaching or passing this square
+        resolve_chains : bool
+            If True, a snake or ladder ending on another snake or ladder is
+            followed until the player comes to rest. Otherwise such chains
+            raise a ValueError.
+
+        Raises
+        ------
+        ValueError
+            If a snake or ladder is off the board, goes the wrong way,
+            shares its start with another one, or is part of a cycle or an
+            unresolved chain, or if a player can land on a square from which
+            the goal cannot be reached, so that games could go on forever.
+        """
+        self.snakes = dict(SNAKE_SQUARES if snakes is None else snakes)
+        self.ladders = dict(LADDER_SQUARES if ladders is None else ladders)
+        self.goal = goal
+
+        for start, end in self.snakes.items():
+            self._check_square(start, end)
+            if end >= start:
+                raise ValueError(
+                    'Snake from {0} to {1} does not go down'.format(start, end))
+        for start, end in self.ladders.items():
+            self._check_square(start, end)
+            if end <= start:
+                raise ValueError(
+                    'Ladder from {0} to {1} does not go up'.format(start, end))
+        shared = self.snakes.keys() & self.ladders.keys()
+        if shared:
+            raise ValueError('Squares {0} have both a snake and a ladder'
+                             .format(sorted(shared)))
+
+        shortcuts = {**self.snakes, **self.ladders}
+        self.destination = list(range(goal + 6))
+        for start, end in shortcuts.items():
+            visited = {start}
+            while end in shortcuts:
+                if not resolve_chains:
+                    raise ValueError('Square {0} leads to square {1}, which '
+                                     'has another snake or ladder'
+                                     .format(start, end))
+                if end in visited:
+                    raise ValueError('Square {0} is part of a cycle'
+                                     .format(start))
+                visited.add(end)
+                end = shortcuts[end]
+            self.destination[start] = end
+        self._check_goal_reachable()
+
+    def _check_square(self, start, end):
+        if not 0 < start < self.goal or not 0 <= end < self.goal:
+            raise ValueError('{0} -> {1} is not on a board with goal {2}'
+                             .format(start, end, self.goal))
+
+    def _check_goal_reachable(self):
+        moves = [{self.destination[square + throw] for throw in range(1, 7)}
+                 for square in range(self.goal)]
+        reached, unvisited = {0}, [0]
+        while unvisited:
+            for square in moves[unvisited.pop()]:
+                if square < self.goal and square not in reached:
+                    reached.add(square)
+                    unvisited.append(square)
+
+        # Squares from which some sequence of throws wins, grown backwards
+        # from the squares which win in a single throw
+        winning = set()
+        grown = True
+        while grown:
+            grown = False
+            for square in reversed(range(self.goal)):
+                if square not in winning and any(
+                        end >= self.goal or end in winning
+                        for end in moves[square]):
+                    winning.add(square)
+                    grown = True
+        stuck = reached - winning
+        if stuck:
+            raise ValueError('The goal cannot be reached from squares {0}'
+                             .format(sorted(stuck)))
+
+    def is_won(self, position):
+        """Returns True if a player at ``position`` has won."""
+        return position >= self.goal
+
+
+DEFAULT_BOARD = Board()
+
+
+def move_player(player, current_pos, board=DEFAULT_BOARD, rng=random):
+    throw = rng.randint(1, 6)
+    return board.destination[current_pos + throw]
+
+
+def single_game(num_players, board=DEFAULT_BOARD, rng=random):
     players = {}
     for player in range(1, num_players + 1):
         players[player] = 0
@@ -40,30 +152,178 @@ def single_game(num_players):
             moves += 1
 
             # Move player
-            players[player] = move_player(player, current_pos)
+            players[player] = move_player(player, current_pos, board, rng)
 
             # Check win
-            if players[player] > 89:
+            if players[player] >= board.goal:
                 start = 0
                 return moves
 
 
-def multiple_games(num_games, num_players):
+def multiple_games(num_games, num_players, board=DEFAULT_BOARD, rng=random):
     total_games = []
     for i in range(1, num_games + 1):
-        games = single_game(num_players)
+        games = single_game(num_players, board, rng)
         total_games.append(games)
     return total_games
 
 
-def multi_game_experiment(num_games, num_players, seed):
-    random.seed(seed)
-    return multiple_games(num_games, num_players)
+def multi_game_experiment(num_games, num_players, seed, engine='python',
+                          workers=None, shard_size=SHARD_SIZE,
+                          board=DEFAULT_BOARD, summarize=False, rng=None):
+    """
+    Play a seeded set of games, returning the number of moves in each.
+
+    Arguments
+    ---------
+    num_games : int
+        The number of games to play
+    num_players : int
+        The number of players in each game
+    seed : int
+        Random generator seed
+    engine : str
+        ``'python'`` plays one game at a time using the ``random`` module,
+        ``'numpy'`` plays all games in lockstep using NumPy arrays. The two
+        engines use different random streams, so only their distributions
+        agree. The exact distribution is available from ``markov_chain``.
+    workers : int
+        If given, the games are split into shards of ``shard_size`` games,
+        each with its own seed derived from ``seed``, and played on a pool
+        of ``workers`` processes. The result does not depend on the number
+        of workers, but differs from the result with ``workers=None``.
+    shard_size : int
+        The number of games in each shard
+    board : Board
+        The board to play on
+    summarize : bool
+        If True, the games are summarised in a ``DurationStatistics`` as
+        they are played instead of being collected in a list, so memory use
+        does not grow with ``num_games``.
+    rng : object
+        If given, the dice are thrown with this generator instead of the
+        ``random`` module, and it is not seeded. The python engine needs a
+        ``randint(a, b)`` method, as offered by ``random.Random`` and the
+        ex05 ``rng_providers``, the numpy engine a NumPy ``Generator``.
+        Cannot be combined with ``workers``.
+
+    Returns
+    -------
+    list[int] or np.ndarray or DurationStatistics
+        The number of moves in each game, or their summary
+    """
+    if workers is not None:
+        if rng is not None:
+            raise ValueError('A generator cannot be shared by workers')
+        return _sharded_experiment(num_games, num_players, seed, engine,
+                                   workers, shard_size, board, summarize)
+    if engine == 'python':
+        if rng is None:
+            random.seed(seed)
+            rng = random
+        if summarize:
+            stats = DurationStatistics()
+            for _ in range(num_games):
+                stats.add(single_game(num_players, board, rng))
+            return stats
+        return multiple_games(num_games, num_players, board, rng)
+    if engine == 'numpy':
+        from lockstep_games import (iter_games_lockstep,
+                                    multiple_games_lockstep)
+        if rng is not None:
+            # np.random.default_rng returns a Generator it is given as is
+            seed = getattr(rng, 'generator', rng)
+        if summarize:
+            stats = DurationStatistics()
+            for chunk in iter_games_lockstep(num_games, num_players, seed,
+                                             board):
+                stats.update(chunk)
+            return stats
+        return multiple_games_lockstep(num_games, num_players, seed, board)
+    raise ValueError('Unknown engine {0!r}, expected one of {1}'.format(
+        engine, ENGINES))
+
+
+def shard_seeds(seed, num_shards):
+    """
+    Derive independent seeds for the shards of an experiment.
+
+    Arguments
+    ---------
+    seed : int
+        The experiment seed
+    num_shards : int
+        The number of seeds to derive
+
+    Returns
+    -------
+    list[int]
+        One 64 bit seed per shard
+    """
+    master = random.Random(seed)
+    return [master.getrandbits(64) for _ in range(num_shards)]
+
+
+def get_pool(workers):
+    """
+    Return a process pool with ``workers`` processes.
+
+    Pools are created on first use and reused by later experiments until
+    ``shutdown_pools`` is called, which is done at exit while there are
+    pools. ``concurrent.futures`` is only imported with the first pool.
+    """
+    if workers not in _pools:
+        from concurrent.futures import ProcessPoolExecutor
+        if not _pools:
+            atexit.register(shutdown_pools)
+        _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+    return _pools[workers]
+
+
+def shutdown_pools():
+    """Shut down all process pools created by ``get_pool``."""
+    atexit.unregister(shutdown_pools)
+    while _pools:
+        _, pool = _pools.popitem()
+        pool.shutdown()
+
+
+def _play_shard(shard):
+    num_games, num_players, seed, engine, board, summarize = shard
+    return multi_game_experiment(num_games, num_players, seed, engine,
+                                 board=board, summarize=summarize)
+
+
+def _sharded_experiment(num_games, num_players, seed, engine, workers,
+                        shard_size, board, summarize):
+    if engine not in ENGINES:
+        raise ValueError('Unknown engine {0!r}, expected one of {1}'.format(
+            engine, ENGINES))
+    sizes = [min(shard_size, num_games - first)
+             for first in range(0, num_games, shard_size)]
+    shards = [(size, num_players, shard_seed, engine, board, summarize)
+              for size, shard_seed in zip(sizes, shard_seeds(seed, len(sizes)))]
+    if workers == 1:
+        results = map(_play_shard, shards)
+    else:
+        results = get_pool(workers).map(_play_shard, shards)
+
+    if summarize:
+        stats = DurationStatistics()
+        for result in results:
+            stats.merge(result)
+        return stats
+    if engine == 'numpy':
+        import numpy as np
+        return np.concatenate([np.empty(0, dtype=np.int64), *results])
+    total_games = []
+    for result in results:
+        total_games.extend(result)
+    return total_games
 
 
 if __name__ == "__main__":
-    result = multi_game_experiment(100, 4, 89)
-    result.sort()
-    print('The shortest game duration was {0}, and the longest was {1}'.format(result[0], result[99]))
-    print('The median is {0}'.format(statistics.median(result)))
-    print('The mean is {0} and the standard deviation is {1:.2}'.format(statistics.mean(result), statistics.stdev(result)))
+    result = multi_game_experiment(100, 4, 89, summarize=True)
+    print('The shortest game duration was {0}, and the longest was {1}'.format(result.min, result.max))
+    print('The median is {0}'.format(result.median))
+    print('The mean is {0} and the standard deviation is {1:.2}'.format(result.mean, result.stdev))
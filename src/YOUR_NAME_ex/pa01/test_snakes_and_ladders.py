@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+import collections
+import importlib.util
+import json
+import os
+import random
+import statistics
+
+import numpy as np
+import pytest
+
+import benchmark
+import checkpoint
+import lockstep_games
+import markov_chain as mc
+import snakes_and_ladders as sl
+
+__author__ = 'Kevin Martin Lankut'
+__email__ = 'kela@nmbu.no'
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__main__.py')
+
+
+def load_cli():
+    """Load the command line interface, whose module name is taken."""
+    spec = importlib.util.spec_from_file_location('pa01_main', MAIN)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_python_engine_reproducible():
+    """Test that the default engine gives the same games for the same seed."""
+    first = sl.multi_game_experiment(50, 3, 89)
+    second = sl.multi_game_experiment(50, 3, 89)
+    assert first == second
+    assert len(first) == 50
+
+
+def test_numpy_engine_reproducible():
+    """Test that the numpy engine gives the same games for the same seed."""
+    first = sl.multi_game_experiment(500, 4, 89, engine='numpy')
+    second = sl.multi_game_experiment(500, 4, 89, engine='numpy')
+    assert list(first) == list(second)
+    assert len(first) == 500
+    assert all(moves >= 1 for moves in first)
+
+
+def test_numpy_engine_matches_python_engine():
+    """Test that both engines give the same mean game length."""
+    python_moves = sl.multi_game_experiment(2000, 2, 1)
+    numpy_moves = sl.multi_game_experiment(20000, 2, 1, engine='numpy')
+    python_mean = statistics.mean(python_moves)
+    numpy_mean = statistics.mean(numpy_moves)
+    tolerance = 5 * statistics.stdev(python_moves) / 2000 ** 0.5
+    assert abs(python_mean - numpy_mean) < tolerance
+
+
+def test_unknown_engine():
+    """Test that an unknown engine raises ValueError."""
+    with pytest.raises(ValueError):
+        sl.multi_game_experiment(10, 2, 1, engine='fortran')
+
+
+def test_markov_single_player_mean():
+    """Test the exact single player distribution against the fundamental
+    matrix of the absorbing chain."""
+    matrix = mc.transition_matrix()
+    pmf = mc.single_player_pmf(matrix)
+    assert abs(pmf.sum() - 1) < 1e-9
+    transient = matrix[:sl.GOAL, :sl.GOAL]
+    expected = np.linalg.solve(np.eye(sl.GOAL) - transient,
+                               np.ones(sl.GOAL))[0]
+    assert abs(pmf @ np.arange(len(pmf)) - expected) < 1e-6
+
+
+def test_markov_trapped_mass():
+    """Test that a chain with a closed set of transient squares raises
+    ValueError instead of running forever."""
+    matrix = np.array([[0.0, 0.5, 0.5],
+                       [0.0, 1.0, 0.0],
+                       [0.0, 0.0, 1.0]])
+    with pytest.raises(ValueError):
+        mc.single_player_pmf(matrix, max_turns=1000)
+
+
+def test_markov_matches_simulation():
+    """Test that the exact game length distribution matches simulation."""
+    num_players = 4
+    pmf = mc.game_duration_pmf(num_players)
+    assert abs(pmf.sum() - 1) < 1e-9
+    assert pmf[:num_players].sum() == 0
+
+    summary = mc.game_duration_summary(num_players)
+    moves = sl.multi_game_experiment(100000, num_players, 5, engine='numpy')
+    assert abs(summary['mean'] - moves.mean()) < 5 * summary['stdev'] / 300
+    assert abs(summary['stdev'] - moves.std()) < 0.05 * summary['stdev']
+    assert abs(summary['median'] - statistics.median(moves)) <= 2
+
+
+@pytest.mark.parametrize('engine', sl.ENGINES)
+def test_workers_reproducible(engine):
+    """Test that sharded experiments do not depend on the number of
+    workers."""
+    serial = sl.multi_game_experiment(250, 3, 7, engine=engine, workers=1,
+                                      shard_size=40)
+    parallel = sl.multi_game_experiment(250, 3, 7, engine=engine, workers=3,
+                                        shard_size=40)
+    assert len(serial) == 250
+    assert list(serial) == list(parallel)
+    assert sl.get_pool(3) is sl.get_pool(3)
+
+
+def test_board_default_layout():
+    """Test that the default board sends players up ladders and down
+    snakes."""
+    board = sl.Board()
+    assert board.destination[1] == 40
+    assert board.destination[87] == 70
+    assert board.destination[2] == 2
+    assert board.is_won(sl.GOAL)
+    assert not board.is_won(sl.GOAL - 1)
+
+
+def test_board_chains():
+    """Test that chains raise ValueError unless they are resolved."""
+    with pytest.raises(ValueError):
+        sl.Board(snakes={20: 10}, ladders={10: 15}, goal=30)
+    board = sl.Board(snakes={20: 10}, ladders={10: 15}, goal=30,
+                     resolve_chains=True)
+    assert board.destination[20] == 15
+    assert board.destination[10] == 15
+    with pytest.raises(ValueError):
+        sl.Board(snakes={20: 10}, ladders={10: 20}, goal=30,
+                 resolve_chains=True)
+
+
+@pytest.mark.parametrize('snakes, ladders', [({5: 8}, {}),
+                                             ({}, {8: 5}),
+                                             ({35: 3}, {}),
+                                             ({5: 3}, {5: 8})])
+def test_board_invalid(snakes, ladders):
+    """Test that invalid snakes and ladders raise ValueError."""
+    with pytest.raises(ValueError):
+        sl.Board(snakes=snakes, ladders=ladders, goal=30)
+
+
+def test_board_unreachable_goal():
+    """Test that boards where a player can be trapped away from the goal
+    raise ValueError."""
+    with pytest.raises(ValueError):
+        sl.Board(snakes={square: 1 for square in range(4, 10)}, ladders={},
+                 goal=10)
+    with pytest.raises(ValueError):
+        sl.Board(snakes={square: 12 for square in range(13, 19)},
+                 ladders={3: 12}, goal=30)
+
+
+def test_custom_board_engines_agree():
+    """Test that both engines and the exact distribution agree on a custom
+    board."""
+    board = sl.Board(snakes={17: 4}, ladders={3: 12}, goal=20)
+    summary = mc.game_duration_summary(2, mc.transition_matrix(board))
+    python_moves = sl.multi_game_experiment(3000, 2, 3, board=board)
+    numpy_moves = sl.multi_game_experiment(30000, 2, 3, engine='numpy',
+                                           board=board)
+    tolerance = 5 * summary['stdev'] / 3000 ** 0.5
+    assert abs(statistics.mean(python_moves) - summary['mean']) < tolerance
+    assert abs(numpy_moves.mean() - summary['mean']) < tolerance
+
+
+@pytest.mark.parametrize('engine', sl.ENGINES)
+def test_summarize_matches_statistics(engine):
+    """Test that the streaming summary agrees with the statistics module."""
+    moves = [int(m) for m in sl.multi_game_experiment(301, 3, 11,
+                                                      engine=engine)]
+    stats = sl.multi_game_experiment(301, 3, 11, engine=engine,
+                                     summarize=True)
+    assert stats.count == 301
+    assert stats.min == min(moves)
+    assert stats.max == max(moves)
+    assert stats.median == statistics.median(moves)
+    assert abs(stats.mean - statistics.mean(moves)) < 1e-9
+    assert abs(stats.stdev - statistics.stdev(moves)) < 1e-9
+    assert stats.quantile(0) == min(moves)
+    assert stats.quantile(1) == max(moves)
+
+
+def test_summarize_merges_shards():
+    """Test that shard summaries merge to the summary of all games."""
+    moves = sl.multi_game_experiment(200, 2, 4, workers=1, shard_size=30)
+    stats = sl.multi_game_experiment(200, 2, 4, workers=1, shard_size=30,
+                                     summarize=True)
+    assert stats.count == 200
+    assert stats.median == statistics.median(moves)
+    assert abs(stats.variance - statistics.variance(moves)) < 1e-9
+    assert sum(stats.histogram) == 200
+
+
+@pytest.mark.parametrize('engine', sl.ENGINES)
+def test_checkpoint_resume(engine, tmp_path, monkeypatch):
+    """Test that a resumed experiment ends exactly like an uninterrupted
+    one."""
+    path = str(tmp_path / 'experiment.pickle')
+    monkeypatch.setattr(lockstep_games, 'CHUNK_SIZE', 50)
+    expected = sl.multi_game_experiment(500, 3, 21, engine=engine,
+                                        summarize=True)
+
+    saves = []
+    save_checkpoint = checkpoint.save_checkpoint
+
+    def interrupted_save(path, state):
+        save_checkpoint(path, state)
+        saves.append(state['games_played'])
+        if len(saves) == 3:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(checkpoint, 'save_checkpoint', interrupted_save)
+    with pytest.raises(KeyboardInterrupt):
+        checkpoint.run_checkpointed(path, 500, 3, 21, engine=engine,
+                                    checkpoint_every=100)
+    monkeypatch.setattr(checkpoint, 'save_checkpoint', save_checkpoint)
+
+    resumed = checkpoint.resume(path)
+    assert resumed.count == 500
+    assert resumed.histogram == expected.histogram
+    assert resumed.mean == pytest.approx(expected.mean)
+    assert checkpoint.resume(path).histogram == expected.histogram
+
+
+def test_injected_generators():
+    """Test that games can draw from a given generator without seeding it."""
+    state = random.getstate()
+    games = sl.multi_game_experiment(50, 2, 8, rng=random.Random(8))
+    assert random.getstate() == state
+    assert games == sl.multi_game_experiment(50, 2, 8)
+    assert (sl.multi_game_experiment(50, 2, 8, engine='numpy',
+                                     rng=np.random.default_rng(8)).tolist()
+            == sl.multi_game_experiment(50, 2, 8, engine='numpy').tolist())
+    with pytest.raises(ValueError):
+        sl.multi_game_experiment(50, 2, 8, workers=2, rng=random.Random(8))
+
+
+def test_cli_summaries(capsys):
+    """Test the text and JSON summaries of the command line interface."""
+    cli = load_cli()
+    expected = sl.multi_game_experiment(50, 2, 3, summarize=True)
+    cli.main(['-n', '50', '-p', '2', '-s', '3'])
+    text = capsys.readouterr().out
+    assert text.startswith('The shortest game duration was {0}, and the '
+                           'longest was {1}\n'.format(expected.min,
+                                                       expected.max))
+    assert 'The median is {0}\n'.format(expected.median) in text
+
+    cli.main(['-n', '50', '-p', '2', '-s', '3', '-f', 'json'])
+    summary = json.loads(capsys.readouterr().out)
+    assert summary['games'] == 50
+    assert (summary['min'], summary['max']) == (expected.min, expected.max)
+    assert summary['mean'] == pytest.approx(expected.mean)
+    assert (summary['players'], summary['seed'],
+            summary['engine']) == (2, 3, 'python')
+
+
+def test_cli_game_lengths(tmp_path, capsys):
+    """Test the CSV and histogram output of the command line interface."""
+    cli = load_cli()
+    expected = sl.multi_game_experiment(50, 2, 3)
+    path = tmp_path / 'games.csv'
+    cli.main(['-n', '50', '-p', '2', '-s', '3', '-f', 'csv',
+              '-o', str(path)])
+    lines = path.read_text().splitlines()
+    assert lines[0] == 'game,moves'
+    assert lines[1:] == ['{0},{1}'.format(game, moves)
+                         for game, moves in enumerate(expected, 1)]
+
+    cli.main(['-n', '50', '-p', '2', '-s', '3', '-f', 'histogram'])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == 'moves,games'
+    counts = dict(map(int, line.split(',')) for line in lines[1:])
+    assert counts == dict(collections.Counter(expected))
+
+
+@pytest.mark.parametrize('argv', [['-n', '-1'],
+                                  ['-p', '0'],
+                                  ['-w', '0'],
+                                  ['--checkpoint', 'x', '-f', 'csv'],
+                                  ['--resume', 'x', '-w', '2']])
+def test_cli_invalid_arguments(argv, capsys):
+    """Test that invalid arguments exit with a usage error."""
+    with pytest.raises(SystemExit) as error:
+        load_cli().main(argv)
+    assert error.value.code == 2
+    assert 'error:' in capsys.readouterr().err
+
+
+def test_cli_no_games(capsys):
+    """Test that summaries of zero games exit with a message."""
+    with pytest.raises(SystemExit) as error:
+        load_cli().main(['-n', '0'])
+    assert error.value.code == 'pa01: no games played'
+
+
+def test_cli_checkpoint_resume(tmp_path, capsys):
+    """Test that a checkpointed run can be summarised again by resuming."""
+    cli = load_cli()
+    path = str(tmp_path / 'experiment.pickle')
+    cli.main(['-n', '200', '-p', '2', '-s', '5', '-f', 'json',
+              '--checkpoint', path, '--checkpoint-every', '50'])
+    played = json.loads(capsys.readouterr().out)
+    cli.main(['--resume', path, '-f', 'json'])
+    resumed = json.loads(capsys.readouterr().out)
+    assert played['games'] == 200
+    assert {key: played[key] for key in resumed} == resumed
+    assert 'seed' not in resumed
+
+
+def test_run_benchmarks_report(monkeypatch):
+    """Test that a small benchmark run gives a comparable report."""
+    monkeypatch.setattr(benchmark, 'MOVE_CALLS', 1000)
+    monkeypatch.setattr(benchmark, 'SINGLE_GAMES', 10)
+    result = benchmark.run_benchmarks(player_counts=[1, 2], game_counts=[100],
+                                      repeat=1, report=lambda line: None)
+    assert set(result) == {'commit', 'time', 'python', 'machine', 'results'}
+    names = [(entry['benchmark'], entry['engine'], entry['num_players'])
+             for entry in result['results']]
+    assert names == [('move_player', 'python', 1),
+                     ('single_game', 'python', 1),
+                     ('single_game', 'python', 2)] + [
+        ('multi_game_experiment', engine, players)
+        for engine in sl.ENGINES for players in (1, 2)]
+    assert all(entry['seconds'] > 0 for entry in result['results'])
+    speedups = benchmark.compare(result, result)
+    assert len(speedups) == len(result['results'])
+    assert all(speedup[-1] == 1 for speedup in speedups)